@@ -0,0 +1,275 @@
+import pygame
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.bundle import AssetBundle
+
+class AssetCache:
+    """Process-wide registry that decodes every image only once"""
+    
+    def __init__(self, root='assets'):
+        self.root = root
+        self.images = {}
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.load_times = {}  # Seconds spent decoding each image
+        
+        # Packed bundle next to the asset folder, loose files are used without one
+        # and in place of the entries they were edited after
+        bundle_path = root.rstrip('/\\') + '.bundle'
+        self.bundle = AssetBundle(bundle_path) if os.path.exists(bundle_path) else None
+        
+    def _bundled(self, key):
+        """Get the bundle key of an asset path relative to root, None to read the loose file"""
+        if self.bundle is None:
+            return None
+        bundle_key = key.replace(os.sep, '/')
+        if bundle_key in self.bundle and self.bundle.is_current(bundle_key, os.path.join(self.root, key)):
+            return bundle_key
+        return None
+        
+    def image(self, *parts, alpha=True):
+        """Get a ready-to-blit surface for the asset at the given path"""
+        key = os.path.join(*parts)
+        surface = self.images.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+            
+        # First request for this asset, decode it from disk
+        self.misses += 1
+        surface, self.load_times[key] = self._decode(key)
+        surface = self._convert(surface, alpha)
+        self.images[key] = surface
+        return surface
+        
+    def _decode(self, key):
+        """Load an image from the bundle or its file, returning the raw surface and the seconds it took"""
+        start = time.perf_counter()
+        bundle_key = self._bundled(key)
+        if bundle_key is not None:
+            surface = self.bundle.image(bundle_key)
+            if pygame.display.get_surface() is None:
+                # The mapped pixels are read-only, keep a private copy until convert() makes one
+                surface = surface.copy()
+        else:
+            surface = pygame.image.load(os.path.join(self.root, key))
+        return surface, time.perf_counter() - start
+        
+    def file(self, path):
+        """Get a file object for a non-image asset from the bundle, or its path when it is a loose file"""
+        bundle_key = self._bundled(os.path.relpath(path, self.root))
+        if bundle_key is not None:
+            return self.bundle.open(bundle_key)
+        return path
+        
+    def preload(self, paths, workers=4):
+        """Start decoding (parts, alpha) images on a thread pool, install them with install()"""
+        # pygame releases the GIL while decoding, so the files load in parallel
+        executor = ThreadPoolExecutor(workers)
+        pending = []
+        for parts, alpha in paths:
+            key = os.path.join(*parts)
+            if key not in self.images:
+                pending.append((key, alpha, executor.submit(self._decode, key)))
+        executor.shutdown(wait=False)
+        return pending
+        
+    def install(self, pending):
+        """Convert and cache the preloaded images that are ready, returning the rest"""
+        # Converting touches the display, so it stays on the main thread
+        remaining = []
+        for key, alpha, future in pending:
+            if not future.done():
+                remaining.append((key, alpha, future))
+                continue
+            surface, self.load_times[key] = future.result()
+            self.misses += 1
+            self.images[key] = self._convert(surface, alpha)
+        return remaining
+        
+    def _convert(self, surface, alpha):
+        """Convert a surface to the display pixel format if there is one"""
+        # convert() needs a display mode, before that keep the raw surface
+        if pygame.display.get_surface() is None:
+            return surface
+        return surface.convert_alpha() if alpha else surface.convert()
+        
+    def memory_usage(self):
+        """Get the number of bytes used by the cached pixel data"""
+        total = 0
+        for surface in self.images.values():
+            total += surface.get_pitch() * surface.get_height()
+        return total
+        
+    def stats(self):
+        """Get cache statistics"""
+        return {
+            'images': len(self.images),
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes': self.memory_usage()
+        }
+        
+    def clear(self):
+        """Drop all cached images and reset the statistics"""
+        self.images = {}
+        self.hits = 0
+        self.misses = 0
+        
+class RotationCache:
+    """Pre-rotated copies of sprites at a fixed number of angle steps"""
+    
+    def __init__(self):
+        self.frames = {}  # (image, steps) -> list of (surface, offset)
+        
+    def get(self, image, angle, steps):
+        """Get the rotated frame closest to the angle and its blit offset from the center"""
+        frames = self.frames.get((image, steps))
+        if frames is None:
+            frames = [None] * steps
+            self.frames[(image, steps)] = frames
+            
+        index = int(round(angle * steps / 360.0)) % steps
+        frame = frames[index]
+        if frame is None:
+            # Rendered lazily the first time this angle is needed
+            frame = self._rotate(image, index * 360.0 / steps)
+            frames[index] = frame
+        return frame
+        
+    def prerender(self, images, steps):
+        """Render every angle of the given images up front"""
+        for image in images:
+            for index in range(steps):
+                self.get(image, index * 360.0 / steps, steps)
+                
+    def _rotate(self, image, angle):
+        """Rotate an image and compute the offset that centers it"""
+        rotated = pygame.transform.rotate(image, angle)
+        offset = rotated.get_rect(center=(0, 0)).topleft
+        return rotated, offset
+        
+    def memory_usage(self):
+        """Get the number of bytes used by the rendered frames"""
+        total = 0
+        for frames in self.frames.values():
+            for frame in frames:
+                if frame is not None:
+                    total += frame[0].get_pitch() * frame[0].get_height()
+        return total
+        
+    def stats(self):
+        """Get memory use and the worst case angle error per step count"""
+        steps_used = sorted(set(steps for _, steps in self.frames))
+        return {
+            'sprites': len(self.frames),
+            'frames': sum(1 for frames in self.frames.values() for frame in frames if frame is not None),
+            'bytes': self.memory_usage(),
+            'max_angle_error': {steps: 180.0 / steps for steps in steps_used}
+        }
+        
+    def clear(self):
+        """Drop all rendered frames"""
+        self.frames = {}
+        
+class TrailCache:
+    """Faded and shrunk ghost copies of sprites for the trail effect"""
+    
+    def __init__(self):
+        self.ghosts = {}  # (image, length) -> list of (surface, offset)
+        
+    def get(self, image, length):
+        """Get the trail ghosts of an image, oldest position first"""
+        ghosts = self.ghosts.get((image, length))
+        if ghosts is None:
+            ghosts = [self._ghost(image, i) for i in range(length)]
+            self.ghosts[(image, length)] = ghosts
+        return ghosts
+        
+    def _ghost(self, image, index):
+        """Render one ghost and compute the offset that centers it"""
+        alpha = 100 - index * 20
+        size_reduction = index * 5
+        
+        ghost = image.copy()
+        ghost.set_alpha(alpha)
+        ghost = pygame.transform.scale(
+            ghost,
+            (image.get_width() - size_reduction,
+             image.get_height() - size_reduction)
+        )
+        offset = ghost.get_rect(center=(0, 0)).topleft
+        return ghost, offset
+        
+    def memory_usage(self):
+        """Get the number of bytes used by the ghost surfaces"""
+        total = 0
+        for ghosts in self.ghosts.values():
+            for ghost, _ in ghosts:
+                total += ghost.get_pitch() * ghost.get_height()
+        return total
+        
+    def clear(self):
+        """Drop all ghost surfaces"""
+        self.ghosts = {}
+        
+class EffectCache:
+    """Effect animations rendered once and looked up by remaining lifetime"""
+    
+    def __init__(self):
+        self.explosions = {}  # (duration, fade) -> list of (surface, offset) per lifetime
+        self.slices = {}  # length -> end offset per angle
+        
+    def explosion(self, lifetime, duration=30, fade=True):
+        """Get the explosion frame for the remaining lifetime and its offset from the center"""
+        frames = self.explosions.get((duration, fade))
+        if frames is None:
+            frames = [self._explosion(i, duration, fade) for i in range(duration + 1)]
+            self.explosions[(duration, fade)] = frames
+        return frames[lifetime]
+        
+    def _explosion(self, lifetime, duration, fade):
+        """Render an expanding circle that fades out over its lifetime, or stays opaque without fade"""
+        # A colorkey and one surface alpha blit much faster than per-pixel alpha
+        radius = 10 + (duration - lifetime) * 3
+        alpha = int((lifetime / duration) * 255)
+        frame = pygame.Surface((radius * 2, radius * 2))
+        frame.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        pygame.draw.circle(frame, (255, 100, 0), (radius, radius), radius)
+        if fade:
+            frame.set_alpha(alpha, pygame.RLEACCEL)
+        return frame, (-radius, -radius)
+        
+    def slice_ends(self, length=50):
+        """Get the end point offsets of a slice line for every whole angle from 0 to 360 degrees"""
+        ends = self.slices.get(length)
+        if ends is None:
+            ends = []
+            for angle in range(361):
+                end = pygame.math.Vector2(1, 0).rotate(angle) * length
+                ends.append((end.x, end.y))
+            self.slices[length] = ends
+        return ends
+        
+    def memory_usage(self):
+        """Get the number of bytes used by the effect frames"""
+        total = 0
+        for frames in self.explosions.values():
+            for frame, _ in frames:
+                total += frame.get_pitch() * frame.get_height()
+        return total
+        
+    def clear(self):
+        """Drop all effect frames"""
+        self.explosions = {}
+        self.slices = {}
+        
+# Shared registry used by the whole game
+assets = AssetCache()
+rotations = RotationCache()
+trails = TrailCache()
+effect_frames = EffectCache()
@@ -0,0 +1,248 @@
+import numpy as np
+import random
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+from src.fruit import launch_state, slice_speed, slice_points, spawn_wave
+from src.physics import move_fruits, blade_touches
+from src.timestep import SIM_RATE
+
+FRUIT_TYPES = ['melon', 'orange', 'pomegranate', 'guava']
+DIFFICULTIES = ('easy', 'medium', 'hard')
+OBS_FIELDS = ('x', 'y', 'speed_x', 'speed_y', 'bomb', 'hit')  # Columns of the fruit observations
+
+class BatchEnv:
+    """Steps many independent games at once with array-shaped actions and observations
+    
+    Each game follows the same spawn, physics, slicing and scoring rules as
+    FruitNinjaGame and draws from its own seeded RNG in the same order, so a
+    game here ends exactly like a headless game with the same seed and input.
+    Games that are over stay frozen until they are reset.
+    """
+    
+    def __init__(self, seeds, width=800, height=600, game_duration=60, max_fruits=16, capacity=32):
+        self.seeds = list(seeds)
+        self.num_envs = len(self.seeds)
+        self.width = width
+        self.height = height
+        self.game_duration = game_duration
+        self.max_fruits = max_fruits  # Fruit slots per game in the observations
+        
+        # What launch_state and spawn_wave need from a game, one RNG per game
+        self.games = [SimpleNamespace(rng=random.Random(seed), width=width, height=height) for seed in self.seeds]
+        
+        # Per game state
+        n = self.num_envs
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lives = np.zeros(n, dtype=np.int64)
+        self.difficulty = np.zeros(n, dtype=np.int8)  # Index into DIFFICULTIES
+        self.frame_count = np.zeros(n, dtype=np.int64)
+        self.time_left = np.zeros(n, dtype=np.int64)
+        self.spawn_timer = np.zeros(n, dtype=np.int64)
+        self.combo_counter = np.zeros(n, dtype=np.int64)
+        self.combo_timer = np.zeros(n, dtype=np.int64)
+        self.blade = np.zeros((n, 2))
+        self.blade_down = np.zeros(n, dtype=bool)
+        self.done = np.ones(n, dtype=bool)
+        
+        # Per fruit state, one row per game in list order
+        self.count = np.zeros(n, dtype=np.int64)
+        self.capacity = 0
+        self._allocate(capacity)
+        
+    def _allocate(self, capacity):
+        """Create the fruit arrays, keeping the fruits that already exist"""
+        n = self.num_envs
+        arrays = {
+            'x': np.zeros((n, capacity)),
+            'y': np.zeros((n, capacity)),
+            'speed_x': np.zeros((n, capacity)),
+            'speed_y': np.zeros((n, capacity)),
+            'time': np.zeros((n, capacity)),
+            'hit': np.zeros((n, capacity), dtype=bool),
+            'bomb': np.zeros((n, capacity), dtype=bool)
+        }
+        for name, array in arrays.items():
+            if self.capacity:
+                array[:, :self.capacity] = getattr(self, name)
+            setattr(self, name, array)
+        self.capacity = capacity
+        
+    def reset(self, indices=None):
+        """Start new rounds for the given games (all by default) and get the observations"""
+        if indices is None:
+            indices = np.arange(self.num_envs)
+        self.score[indices] = 0
+        self.lives[indices] = 3
+        self.difficulty[indices] = 0
+        self.frame_count[indices] = 0
+        self.time_left[indices] = self.game_duration
+        self.spawn_timer[indices] = 0
+        self.combo_counter[indices] = 0
+        self.combo_timer[indices] = 0
+        self.blade_down[indices] = False
+        self.count[indices] = 0
+        self.done[indices] = False
+        return self.observe()
+        
+    def step(self, actions):
+        """Advance every running game one simulation step
+        
+        actions is an (N, 3) array of blade x, y and pressed. Returns the
+        observations, the score gained by each game and which games are over.
+        """
+        actions = np.asarray(actions, dtype=np.float64)
+        live = ~self.done
+        score_before = self.score.copy()
+        self.frame_count[live] += 1
+        
+        # Slice along the path each blade moved since the last step
+        down = live & (actions[:, 2] > 0)
+        if down.any():
+            self._slice(actions[:, :2], down)
+        self.blade[down] = actions[down, :2]
+        self.blade_down[live] = down[live]
+        
+        # Spawn new waves where the timer ran out
+        self.spawn_timer[live] -= 1
+        for env in np.flatnonzero(live & (self.spawn_timer <= 0)):
+            self.spawn_timer[env] = spawn_wave(
+                self.games[env].rng, DIFFICULTIES[self.difficulty[env]], FRUIT_TYPES,
+                lambda name, env=env: self._spawn(env, name))
+        
+        # Combo timers
+        counting = live & (self.combo_timer > 0)
+        self.combo_timer[counting] -= 1
+        self.combo_counter[live & ~counting] = 0
+        
+        self._move(live)
+        
+        # Difficulty goes up with the score
+        self.difficulty[live & (self.score >= 15) & (self.difficulty < 1)] = 1
+        self.difficulty[live & (self.score >= 30)] = 2
+        
+        # The round clock counts simulation steps
+        self.time_left[live] = np.maximum(0, self.game_duration - self.frame_count[live] // SIM_RATE)
+        self.done |= live & ((self.lives <= 0) | (self.time_left <= 0))
+        
+        return self.observe(), self.score - score_before, self.done.copy()
+        
+    def _slice(self, pos, down):
+        """Slice every fruit the blades touched, in list order per game"""
+        prev = np.where(self.blade_down[:, None], self.blade, pos)
+        
+        # Every fruit against its own game's blade segment
+        slots = np.arange(self.capacity) < self.count[:, None]
+        touched = blade_touches(self.x, self.y, prev[:, 0:1], prev[:, 1:2], pos[:, 0:1], pos[:, 1:2])
+        touched &= ~self.hit & slots & down[:, None]
+        
+        # Random draws and combos depend on the order, so this part stays a loop
+        hit_bomb = np.zeros(self.num_envs, dtype=bool)
+        for env, i in zip(*np.nonzero(touched)):
+            self.hit[env, i] = True
+            self.speed_x[env, i], self.speed_y[env, i] = slice_speed(
+                self.games[env].rng, self.speed_x[env, i], self.speed_y[env, i])
+            if self.bomb[env, i]:
+                hit_bomb[env] = True
+            else:
+                self.score[env] += slice_points(self.combo_counter[env])
+                self.combo_counter[env] += 1
+                self.combo_timer[env] = SIM_RATE
+        self.lives[hit_bomb] -= 1
+        
+    def _spawn(self, env, name):
+        """Add a new fruit or bomb to one game"""
+        if self.count[env] == self.capacity:
+            self._allocate(self.capacity * 2)
+        
+        i = self.count[env]
+        x, y, speed_x, speed_y, _, _ = launch_state(self.games[env])
+        self.x[env, i] = x
+        self.y[env, i] = y
+        self.speed_x[env, i] = speed_x
+        self.speed_y[env, i] = speed_y
+        self.time[env, i] = 0
+        self.hit[env, i] = False
+        self.bomb[env, i] = name == 'bomb'
+        self.count[env] += 1
+        
+    def _move(self, live):
+        """Step the physics of all fruits in running games and cull the ones that fell off"""
+        moving = live[:, None] & (np.arange(self.capacity) < self.count[:, None])
+        move_fruits(self.x, self.y, self.speed_x, self.speed_y, self.time, moving)
+        
+        # Move the fallen fruits to the end of their rows, keeping the order
+        fallen = moving & (self.y > self.height + 100)
+        rows = np.flatnonzero(fallen.any(axis=1))
+        if not len(rows):
+            return
+        keep = moving[rows] & ~fallen[rows]
+        order = np.argsort(~keep, axis=1, kind='stable')
+        for name in ('x', 'y', 'speed_x', 'speed_y', 'time', 'hit', 'bomb'):
+            array = getattr(self, name)
+            array[rows] = np.take_along_axis(array[rows], order, axis=1)
+        self.count[rows] = keep.sum(axis=1)
+        
+    def observe(self):
+        """Get the state of every game as arrays, fruits padded to max_fruits slots"""
+        k = min(self.max_fruits, self.capacity)
+        fruits = np.zeros((self.num_envs, self.max_fruits, len(OBS_FIELDS)), dtype=np.float32)
+        for column, name in enumerate(OBS_FIELDS):
+            fruits[:, :k, column] = getattr(self, name)[:, :k]
+        return {
+            'fruits': fruits,
+            'fruit_mask': np.arange(self.max_fruits) < self.count[:, None],
+            'score': self.score.copy(),
+            'lives': self.lives.copy(),
+            'time_left': self.time_left.copy(),
+            'combo': self.combo_counter.copy()
+        }
+        
+    def results(self):
+        """Get the outcome of every game"""
+        return [
+            {'seed': seed, 'score': int(score), 'lives': int(lives), 'steps': int(steps)}
+            for seed, score, lives, steps in zip(self.seeds, self.score, self.lives, self.frame_count)
+        ]
+
+def script_actions(scripts, env):
+    """Get the actions of every running game from its own scripted input"""
+    actions = np.zeros((env.num_envs, 3))
+    if scripts is None:
+        return actions
+    for i in np.flatnonzero(~env.done):
+        (x, y), down = scripts[i].cursor(int(env.frame_count[i]) + 1, env.width, env.height)
+        actions[i] = (x, y, down)
+    return actions
+
+def run_episodes(seeds, script_factory=None, **kwargs):
+    """Play one round per seed in a single batch and return the results
+    
+    script_factory makes the scripted input of a game from its seed, the way
+    a headless game with that seed makes it.
+    """
+    env = BatchEnv(seeds, **kwargs)
+    scripts = [script_factory(seed) for seed in env.seeds] if script_factory else None
+    env.reset()
+    while not env.done.all():
+        env.step(script_actions(scripts, env))
+    return env.results()
+
+def run_sharded(seeds, script_factory=None, workers=None, **kwargs):
+    """Play one round per seed, split into batches over a process pool
+    
+    script_factory goes to the workers, so it has to pickle, like a
+    functools.partial of a module level function.
+    """
+    seeds = list(seeds)
+    workers = workers or mp.cpu_count()
+    shards = [list(shard) for shard in np.array_split(seeds, workers) if len(shard)]
+    
+    # Spawned like the tracker worker so children don't inherit pygame state
+    results = []
+    with ProcessPoolExecutor(len(shards), mp_context=mp.get_context('spawn')) as pool:
+        futures = [pool.submit(run_episodes, [int(seed) for seed in shard], script_factory, **kwargs) for shard in shards]
+        for future in futures:
+            results.extend(future.result())
+    return results
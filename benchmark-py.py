@@ -0,0 +1,212 @@
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import numpy as np
+import pygame
+
+from src.game import FruitNinjaGame
+from src.fruit import TRAIL_LENGTH
+
+DEFAULT_COUNTS = (10, 100, 1000, 5000)
+PERCENTILES = (50, 90, 99)
+
+def _scatter(game, count):
+    """Fill the game with count fruits spread over the screen, with full trails"""
+    manager = game.fruit_manager
+    manager.clear()
+    manager.spawn_timer = 10 ** 9  # Measure the fruits we placed, not spawning
+    for i in range(count):
+        manager._spawn('bomb' if i % 10 == 9 else manager.fruit_types[i % len(manager.fruit_types)])
+    
+    # Same layout for every call at a count so runs compare
+    rng = random.Random(count)
+    xs = [rng.uniform(0, game.width) for _ in range(count)]
+    ys = [rng.uniform(0, game.height) for _ in range(count)]
+    if hasattr(manager, 'count'):
+        n = manager.count
+        manager.x[:n] = manager.prev_x[:n] = xs
+        manager.y[:n] = manager.prev_y[:n] = ys
+        manager.speed_y[:n] = -5
+        manager.time[:n] = 0
+        manager.hit[:n] = False
+        manager.positions[:n, :, 0] = np.array(xs)[:, None]
+        manager.positions[:n, :, 1] = np.array(ys)[:, None] + np.arange(TRAIL_LENGTH) * 10
+        manager.trail_start[:n] = 0
+        manager.trail_count[:n] = TRAIL_LENGTH
+    else:
+        for fruit, x, y in zip(manager.fruits, xs, ys):
+            fruit.x = fruit.prev_x = x
+            fruit.y = fruit.prev_y = y
+            fruit.speed_y = -5
+            fruit.time = 0
+            fruit.hit = False
+            for j in range(TRAIL_LENGTH):
+                fruit.positions[j] = (x, y + j * 10)
+            fruit.trail_start = 0
+            fruit.trail_count = TRAIL_LENGTH
+        manager.grid.clear()
+        for i, fruit in enumerate(manager.fruits):
+            manager.grid.insert(i, fruit.x, fruit.y)
+
+def _fill_effects(game, count):
+    """Replace the effects with count fresh slices and explosions"""
+    game.effects.clear()
+    rng = random.Random(count)
+    for i in range(count):
+        effect_type = 'explosion' if i % 4 == 3 else 'slice'
+        game.effects.add_effect(effect_type, rng.uniform(0, game.width), rng.uniform(0, game.height))
+
+def _case_fruit_update(game, count):
+    """FruitManager.update over count fruits, placed again before every call"""
+    _scatter(game, count)
+    return game.fruit_manager.update, lambda: _scatter(game, count)
+
+def _case_fruit_draw(game, count, trails):
+    """FruitManager.draw, which calls Fruit.draw per fruit, with or without trails"""
+    _scatter(game, count)
+    game.settings['show_trails'] = trails
+    return lambda: game.fruit_manager.draw(game.screen, 0.5), None
+
+def _case_collisions(game, count):
+    """FruitManager.check_collisions for one blade swipe"""
+    # A blade across the middle of the screen, fruits are restored after every slice
+    _scatter(game, count)
+    blade = ((game.width * 0.9, game.height * 0.5), (game.width * 0.1, game.height * 0.4))
+    return lambda: game.fruit_manager.check_collisions(*blade), lambda: _scatter(game, count)
+
+def _case_effects_update(game, count):
+    """EffectManager.update over count effects"""
+    _fill_effects(game, count)
+    return game.effects.update, lambda: _fill_effects(game, count)
+
+def _case_effects_draw(game, count):
+    """EffectManager.draw over count effects"""
+    _fill_effects(game, count)
+    return lambda: game.effects.draw(game.screen), None
+
+def _case_hud(game, count):
+    """The UI HUD draw calls of one playing frame"""
+    # The score changes now and then like in a round, so text renders miss the cache sometimes
+    calls = iter(range(10 ** 9))
+    def draw():
+        i = next(calls)
+        game.ui.draw_score(game.screen, i // 10)
+        game.ui.draw_timer(game.screen, 60 - i // 60 % 60)
+        game.ui.draw_lives(game.screen, 3 - i // 100 % 4)
+        game.ui.draw_difficulty(game.screen, game.difficulty)
+    return draw, None
+
+# Name: (setup(game, count) -> (call, prepare or None), scales with the entity count)
+CASES = {
+    'fruit_update': (_case_fruit_update, True),
+    'fruit_draw_trails': (lambda game, count: _case_fruit_draw(game, count, True), True),
+    'fruit_draw_plain': (lambda game, count: _case_fruit_draw(game, count, False), True),
+    'check_collisions': (_case_collisions, True),
+    'effects_update': (_case_effects_update, True),
+    'effects_draw': (_case_effects_draw, True),
+    'hud_draw': (_case_hud, False)
+}
+
+def measure(call, prepare=None, repeat=50, warmup=5):
+    """Time repeat calls, running prepare untimed before each one, and get the latency stats in ms"""
+    samples = []
+    for i in range(warmup + repeat):
+        if prepare:
+            prepare()
+        start = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed * 1000)
+    
+    samples = np.array(samples)
+    stats = {f'p{p}': float(np.percentile(samples, p)) for p in PERCENTILES}
+    stats.update(mean=float(samples.mean()), min=float(samples.min()), max=float(samples.max()), calls=repeat)
+    return stats
+
+def run_suite(cases=None, counts=DEFAULT_COUNTS, repeat=50, warmup=5, physics='objects', rotation_steps=0):
+    """Run the benchmarks headless and get the stats keyed by 'case/count'"""
+    game = FruitNinjaGame(headless=True, seed=0, physics=physics, rotation_steps=rotation_steps)
+    game.reset_game()
+    results = {}
+    for name in cases or CASES:
+        setup, scales = CASES[name]
+        for count in (counts if scales else (1,)):
+            call, prepare = setup(game, count)
+            stats = measure(call, prepare, repeat, warmup)
+            results[f'{name}/{count}'] = stats
+            print(f"{name:>20}/{count:<5} p50 {stats['p50']:8.3f} ms  p99 {stats['p99']:8.3f} ms")
+    pygame.quit()
+    
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'machine': platform.machine(),
+            'physics': physics,
+            'rotation_steps': rotation_steps,
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+def compare(current, baseline, threshold=0.1, metric='p50'):
+    """Compare two suite runs and get the rows that got slower and faster than the threshold"""
+    regressions = []
+    improvements = []
+    for key, stats in current['results'].items():
+        if key not in baseline['results']:
+            continue
+        old = baseline['results'][key][metric]
+        new = stats[metric]
+        change = (new - old) / old if old else 0.0
+        if change > threshold:
+            regressions.append((key, old, new, change))
+        elif change < -threshold:
+            improvements.append((key, old, new, change))
+    return regressions, improvements
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the game hot paths headless')
+    parser.add_argument('--cases', default=','.join(CASES), help='Comma separated cases to run')
+    parser.add_argument('--counts', default=','.join(map(str, DEFAULT_COUNTS)), help='Comma separated entity counts')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed calls per case')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed calls before timing')
+    parser.add_argument('--physics', choices=['objects', 'numpy'], default='objects')
+    parser.add_argument('--rotation-steps', type=int, default=0)
+    parser.add_argument('--output', help='Save the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against results saved with --output')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative p50 change counted as a regression or improvement')
+    args = parser.parse_args()
+    
+    current = run_suite(
+        cases=args.cases.split(','),
+        counts=[int(count) for count in args.counts.split(',')],
+        repeat=args.repeat,
+        warmup=args.warmup,
+        physics=args.physics,
+        rotation_steps=args.rotation_steps
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions, improvements = compare(current, baseline, args.threshold)
+        for label, rows in (('Slower', regressions), ('Faster', improvements)):
+            for key, old, new, change in rows:
+                print(f"{label}: {key} {old:.3f} -> {new:.3f} ms ({change:+.0%})")
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions")
+
+if __name__ == "__main__":
+    main()
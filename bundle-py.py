@@ -0,0 +1,163 @@
+import os
+import io
+import sys
+import json
+import mmap
+import struct
+import argparse
+import pygame
+
+MAGIC = b'FNBUNDL1'
+HEADER = struct.Struct('<8sI')  # Magic and the length of the JSON index that follows
+ALIGN = 64  # Blob alignment in the file
+ATLAS_WIDTH = 1024
+ATLAS_DIRS = ('images',)  # Sprites under these folders go into the atlas
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+def _pack_shelves(sizes, width, padding=1):
+    """Place rects of the given sizes in rows, tallest first, returning positions and the height used"""
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:
+            # Start a new shelf under the tallest sprite of this one
+            y += shelf_height + padding
+            x = shelf_height = 0
+        positions[i] = (x, y)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+def _stamp(path):
+    """Get the size and modification time of a file, to tell when its bundled copy is outdated"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def pack(root='assets', output=None):
+    """Bake every asset under root into one bundle file: a sprite atlas, raw pixels and raw files"""
+    output = output or root.rstrip('/\\') + '.bundle'
+    files = []
+    for folder, _, names in os.walk(root):
+        for name in sorted(names):
+            path = os.path.join(folder, name)
+            files.append(os.path.relpath(path, root).replace(os.sep, '/'))
+    files.sort()
+
+    index = {}
+    blobs = []
+
+    def add_blob(data):
+        offset = sum(len(blob) for blob in blobs)
+        blobs.append(data + bytes(-len(data) % ALIGN))
+        return offset
+
+    # Sprites share one RGBA atlas, other images are stored as raw pixels
+    sprites = []
+    for key in files:
+        path = os.path.join(root, key)
+        if not key.lower().endswith(IMAGE_EXTENSIONS):
+            with open(path, 'rb') as f:
+                data = f.read()
+            index[key] = {'type': 'file', 'offset': add_blob(data), 'length': len(data), 'source': _stamp(path)}
+            continue
+        surface = pygame.image.load(path)
+        if key.split('/')[0] in ATLAS_DIRS:
+            sprites.append((key, surface))
+            continue
+        alpha = bool(surface.get_flags() & pygame.SRCALPHA)
+        pixel_format = 'RGBA' if alpha else 'RGB'
+        data = pygame.image.tostring(surface, pixel_format)
+        index[key] = {'type': 'pixels', 'offset': add_blob(data), 'length': len(data),
+                      'size': surface.get_size(), 'format': pixel_format, 'source': _stamp(path)}
+
+    if sprites:
+        width = max(ATLAS_WIDTH, max(surface.get_width() for _, surface in sprites))
+        positions, height = _pack_shelves([surface.get_size() for _, surface in sprites], width)
+        atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+        atlas.fill((0, 0, 0, 0))
+        for (key, surface), position in zip(sprites, positions):
+            atlas.blit(surface, position)
+            index[key] = {'type': 'sprite', 'rect': [position[0], position[1]] + list(surface.get_size()),
+                          'source': _stamp(os.path.join(root, key))}
+        data = pygame.image.tostring(atlas, 'RGBA')
+        index['@atlas'] = {'type': 'pixels', 'offset': add_blob(data), 'length': len(data),
+                           'size': [width, height], 'format': 'RGBA'}
+
+    # Blob offsets are relative to the first aligned byte after the index
+    header = json.dumps(index, separators=(',', ':')).encode()
+    with open(output, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        f.write(bytes(-(HEADER.size + len(header)) % ALIGN))
+        for blob in blobs:
+            f.write(blob)
+    print(f"Packed {len(index)} entries from {root} into {output} ({os.path.getsize(output) / 1e6:.1f} MB)")
+    return output
+
+class AssetBundle:
+    """Read-only view of a packed bundle, surfaces are built straight from the mapped file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an asset bundle")
+        start = HEADER.size + index_length
+        self.index = json.loads(self.data[HEADER.size:start])
+        self.base = start + (-start % ALIGN)
+        self.atlas = None
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def is_current(self, key, path):
+        """Check that the loose file an entry was packed from is unchanged, or gone as in a shipped build"""
+        source = self.index[key].get('source')
+        if source is None or not os.path.exists(path):
+            return True
+        return _stamp(path) == source
+
+    def _view(self, entry):
+        """Get the mapped bytes of an entry without copying"""
+        start = self.base + entry['offset']
+        return memoryview(self.data)[start:start + entry['length']]
+
+    def image(self, key):
+        """Get the surface of an image, sprites are subsurfaces of the shared atlas"""
+        entry = self.index[key]
+        if entry['type'] == 'sprite':
+            if self.atlas is None:
+                self.atlas = self._pixels(self.index['@atlas'])
+            return self.atlas.subsurface(entry['rect'])
+        return self._pixels(entry)
+
+    def _pixels(self, entry):
+        """Wrap raw pixels in a surface, no decoding or copy"""
+        return pygame.image.frombuffer(self._view(entry), tuple(entry['size']), entry['format'])
+
+    def open(self, key):
+        """Get a file-like object with the bytes of a raw file such as a font"""
+        return io.BytesIO(self._view(self.index[key]))
+
+    def close(self):
+        """Unmap the file, only once no surface made from it is left"""
+        self.atlas = None
+        self.data.close()
+        self.file.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack the asset folder into one memory-mapped bundle')
+    parser.add_argument('--root', default='assets', help='Asset folder to pack')
+    parser.add_argument('--output', help='Bundle file (default: <root>.bundle)')
+    args = parser.parse_args()
+    if not os.path.isdir(args.root):
+        print(f"No asset folder at {args.root}")
+        sys.exit(1)
+    pack(args.root, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import math
+
+def segment_distance_sq(px, py, ax, ay, bx, by):
+    """Get the squared distance from point p to the segment a-b"""
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        # Degenerate segment, the blade did not move
+        ex = px - ax
+        ey = py - ay
+        return ex * ex + ey * ey
+        
+    # Project p onto the segment and clamp to its ends
+    t = ((px - ax) * dx + (py - ay) * dy) / length_sq
+    t = max(0.0, min(1.0, t))
+    ex = px - (ax + t * dx)
+    ey = py - (ay + t * dy)
+    return ex * ex + ey * ey
+
+class SpatialHash:
+    """Uniform grid of entity indices for fast blade queries"""
+    
+    def __init__(self, cell_size=80):
+        self.cell_size = cell_size
+        self.cells = {}
+        
+    def clear(self):
+        """Remove all entities"""
+        self.cells = {}
+        
+    def insert(self, index, x, y):
+        """Add the entity with the given index at a position"""
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [index]
+        else:
+            cell.append(index)
+            
+    def query_segment(self, ax, ay, bx, by, radius):
+        """Get the sorted indices of entities that may be within radius of the segment a-b"""
+        if not self.cells:
+            return []
+            
+        size = self.cell_size
+        # Samples are at most one cell apart, so every point near the segment
+        # is within radius plus half a cell of one of them
+        reach = int(math.ceil((radius + size / 2) / size))
+        
+        # Walk the segment in steps of at most one cell
+        steps = max(1, int(math.ceil(math.hypot(bx - ax, by - ay) / size)))
+        keys = set()
+        for i in range(steps + 1):
+            t = i / steps
+            cx = int((ax + (bx - ax) * t) // size)
+            cy = int((ay + (by - ay) * t) // size)
+            for ox in range(-reach, reach + 1):
+                for oy in range(-reach, reach + 1):
+                    keys.add((cx + ox, cy + oy))
+        
+        found = []
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell:
+                found.extend(cell)
+        found.sort()
+        return found
@@ -0,0 +1,164 @@
+import math
+
+class PassThrough:
+    """Cursor filter that returns the last measurement unchanged"""
+    
+    def __init__(self):
+        self.pos = None
+        
+    def update(self, pos, t):
+        """Add a measurement taken at time t"""
+        self.pos = pos
+        return pos
+        
+    def sample(self, t):
+        """Get the cursor position for time t"""
+        return self.pos
+        
+    def reset(self):
+        """Forget all measurements"""
+        self.pos = None
+
+class OneEuroFilter(PassThrough):
+    """Speed-adaptive low-pass filter: smooth when still, responsive when moving"""
+    
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        super().__init__()
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+        
+    def reset(self):
+        """Forget all measurements"""
+        self.pos = None
+        self.speed = (0.0, 0.0)
+        self.t = None
+        
+    def _alpha(self, cutoff, dt):
+        """Get the smoothing factor for a cutoff frequency"""
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+        
+    def update(self, pos, t):
+        """Add a measurement taken at time t"""
+        if self.pos is None or t <= self.t:
+            self.pos = (float(pos[0]), float(pos[1]))
+            self.t = t
+            return self.pos
+            
+        dt = t - self.t
+        self.t = t
+        
+        # Smoothed speed drives the cutoff of the position filter
+        a_d = self._alpha(self.d_cutoff, dt)
+        speed = [0.0, 0.0]
+        smoothed = [0.0, 0.0]
+        for i in range(2):
+            raw_speed = (pos[i] - self.pos[i]) / dt
+            speed[i] = self.speed[i] + a_d * (raw_speed - self.speed[i])
+        cutoff = self.min_cutoff + self.beta * math.hypot(speed[0], speed[1])
+        a = self._alpha(cutoff, dt)
+        for i in range(2):
+            smoothed[i] = self.pos[i] + a * (pos[i] - self.pos[i])
+        
+        self.speed = tuple(speed)
+        self.pos = tuple(smoothed)
+        return self.pos
+
+class KalmanPredictor(PassThrough):
+    """Constant-velocity Kalman filter that extrapolates the cursor to the requested time"""
+    
+    def __init__(self, process_noise=5000.0, measurement_noise=25.0, max_lead=0.1):
+        super().__init__()
+        self.q = process_noise  # Acceleration variance, px^2/s^4
+        self.r = measurement_noise  # Measurement variance, px^2
+        self.max_lead = max_lead  # Never extrapolate further than this, seconds
+        self.reset()
+        
+    def reset(self):
+        """Forget all measurements"""
+        self.pos = None
+        self.t = None
+        self.state = None  # Per axis [position, velocity]
+        self.cov = None  # Per axis [p00, p01, p11]
+        
+    def update(self, pos, t):
+        """Add a measurement taken at time t"""
+        if self.state is None:
+            self.state = [[float(pos[0]), 0.0], [float(pos[1]), 0.0]]
+            self.cov = [[self.r, 0.0, 1e6], [self.r, 0.0, 1e6]]
+            self.t = t
+            self.pos = (float(pos[0]), float(pos[1]))
+            return self.pos
+            
+        dt = max(t - self.t, 1e-3)
+        self.t = t
+        for i in range(2):
+            p, v = self.state[i]
+            p00, p01, p11 = self.cov[i]
+            
+            # Predict
+            p += v * dt
+            q = self.q
+            p00 += dt * (2 * p01 + dt * p11) + q * dt ** 3 / 3
+            p01 += dt * p11 + q * dt ** 2 / 2
+            p11 += q * dt
+            
+            # Correct with the measurement
+            s = p00 + self.r
+            k0 = p00 / s
+            k1 = p01 / s
+            residual = pos[i] - p
+            p += k0 * residual
+            v += k1 * residual
+            p11 -= k1 * p01
+            p01 -= k0 * p01
+            p00 -= k0 * p00
+            
+            self.state[i] = [p, v]
+            self.cov[i] = [p00, p01, p11]
+        
+        self.pos = (self.state[0][0], self.state[1][0])
+        return self.pos
+        
+    def sample(self, t):
+        """Get the cursor position extrapolated to time t"""
+        if self.state is None:
+            return None
+        lead = min(max(t - self.t, 0.0), self.max_lead)
+        return (self.state[0][0] + self.state[0][1] * lead,
+                self.state[1][0] + self.state[1][1] * lead)
+
+class FilterChain(PassThrough):
+    """Runs measurements through several filters, sampling from the last one"""
+    
+    def __init__(self, *filters):
+        super().__init__()
+        self.filters = filters
+        
+    def reset(self):
+        """Forget all measurements"""
+        for cursor_filter in self.filters:
+            cursor_filter.reset()
+            
+    def update(self, pos, t):
+        """Add a measurement taken at time t"""
+        for cursor_filter in self.filters:
+            pos = cursor_filter.update(pos, t)
+        return pos
+        
+    def sample(self, t):
+        """Get the cursor position for time t"""
+        return self.filters[-1].sample(t)
+
+FILTERS = {
+    'none': PassThrough,
+    'one_euro': OneEuroFilter,
+    'kalman': KalmanPredictor,
+    'one_euro+kalman': lambda: FilterChain(OneEuroFilter(), KalmanPredictor())
+}
+
+def make_filter(name):
+    """Create a cursor filter by name"""
+    return FILTERS[name]()
@@ -1,55 +1,157 @@
 import pygame
-import random
-import os
-import math
+
+from src.assets import assets, rotations, trails
+from src.collision import SpatialHash, segment_distance_sq
+from src.text import text_cache
+from src.timestep import SIM_RATE
+from src.ui import PLAYER_COLORS
+
+TRAIL_LENGTH = 5  # Positions kept for the trail effect
+COLLISION_RADIUS = 40
+
+def launch_state(game):
+    """Roll the starting position, velocity and spin of a new fruit from the game's RNG"""
+    rng = game.rng
+    x = rng.randint(100, game.width - 100)
+    y = game.height + 50
+    speed_x = rng.randint(-10, 10)
+    speed_y = rng.randint(-80, -60)
+    rotation = rng.randint(0, 360)
+    rotation_speed = rng.randint(-6, 6)
+    return x, y, speed_x, speed_y, rotation, rotation_speed
+    
+def slice_speed(rng, speed_x, speed_y):
+    """Get the velocity of a fruit knocked sideways and up by the blade"""
+    return speed_x + rng.randint(-5, 5), speed_y - 5
+    
+def slice_points(combo_counter):
+    """Get the points for slicing a fruit during a combo of the given length"""
+    return 1 + combo_counter // 2
+    
+def spawn_wave(rng, difficulty, fruit_types, spawn):
+    """Spawn a random number of fruits and maybe a bomb, returning the steps until the next wave"""
+    # Determine how many fruits to spawn
+    base_count = {
+        'easy': 1,
+        'medium': 2,
+        'hard': 3
+    }[difficulty]
+    
+    count = base_count + rng.randint(0, 1)
+    
+    # Spawn fruits
+    for _ in range(count):
+        fruit_type = rng.choice(fruit_types)
+        spawn(fruit_type)
+        
+    # Maybe spawn a bomb
+    bomb_chance = {
+        'easy': 0.1,
+        'medium': 0.2,
+        'hard': 0.3
+    }[difficulty]
+    
+    if rng.random() < bomb_chance:
+        spawn('bomb')
+        
+    # Reset spawn timer
+    base_timer = {
+        'easy': 90,
+        'medium': 60,
+        'hard': 45
+    }[difficulty]
+    
+    return base_timer + rng.randint(-10, 10)
+    
+def draw_trail(surface, game, image, rotation, positions, trail_start, trail_count, dirty=None):
+    """Draw the trail ghosts for a ring buffer of positions, adding the touched rects to dirty"""
+    steps = game.settings['rotation_steps']
+    ghosts = trails.get(image, TRAIL_LENGTH)
+    rotate_trails = steps and game.settings['rotate_trails']
+    # Only the newest trail_length ghosts when the quality setting shortens trails
+    for i in range(max(0, trail_count - game.settings['trail_length']), trail_count):
+        pos = positions[(trail_start + i) % TRAIL_LENGTH]
+        trail_img, offset = ghosts[i]
+        if rotate_trails:
+            trail_img, offset = rotations.get(trail_img, rotation, steps)
+        rect = surface.blit(trail_img, (pos[0] + offset[0], pos[1] + offset[1]))
+        if dirty is not None:
+            dirty.append(rect)
+            
+def draw_rotated(surface, game, image, x, y, rotation, dirty=None):
+    """Draw an image rotated around its center, adding the touched rect to dirty"""
+    steps = game.settings['rotation_steps']
+    if steps:
+        # Look up a pre-rotated frame instead of rotating every frame
+        rotated_img, offset = rotations.get(image, rotation, steps)
+        rect = surface.blit(rotated_img, (x + offset[0], y + offset[1]))
+    else:
+        # Rotate image
+        rotated_img = pygame.transform.rotate(image, rotation)
+        img_rect = rotated_img.get_rect(center=(x, y))
+        rect = surface.blit(rotated_img, img_rect)
+    if dirty is not None:
+        dirty.append(rect)
 
 class Fruit:
     """Base class for all game entities (fruits and bombs)"""
     
+    __slots__ = (
+        'game', 'name', 'is_bomb', 'image', 'half_image',
+        'x', 'y', 'speed_x', 'speed_y', 'active', 'hit', 'time',
+        'rotation', 'rotation_speed', 'positions', 'trail_start', 'trail_count',
+        'prev_x', 'prev_y', 'prev_rotation'
+    )
+    
     def __init__(self, game, name, is_bomb=False):
         self.game = game
         self.name = name
         self.is_bomb = is_bomb
         
-        # Load images
-        img_path = os.path.join('assets', 'images', 'fruits', f'{name}.png')
-        self.image = pygame.image.load(img_path)
+        # Images come from the shared cache, so spawning never touches the disk
+        self.image = assets.image('images', 'fruits', f'{name}.png')
         
         # Half fruit is the sliced version
         if is_bomb:
-            half_img_path = os.path.join('assets', 'images', 'fruits', 'explosion.png')
+            self.half_image = assets.image('images', 'fruits', 'explosion.png')
         else:
-            half_img_path = os.path.join('assets', 'images', 'fruits', f'half_{name}.png')
-        self.half_image = pygame.image.load(half_img_path)
+            self.half_image = assets.image('images', 'fruits', f'half_{name}.png')
+            
+        # Ring buffer of recent positions for the trail effect
+        self.positions = [(0, 0)] * TRAIL_LENGTH
         
         # Initialize properties
         self.reset()
         
     def reset(self):
         """Reset fruit to its initial state"""
-        # Position and velocity
-        self.x = random.randint(100, self.game.width - 100)
-        self.y = self.game.height + 50
-        self.speed_x = random.randint(-10, 10)
-        self.speed_y = random.randint(-80, -60)
+        # Position, velocity and smooth rotation
+        (self.x, self.y, self.speed_x, self.speed_y,
+         self.rotation, self.rotation_speed) = launch_state(self.game)
+        
+        # State of the previous simulation step, for interpolated drawing
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.prev_rotation = self.rotation
         
         # State
         self.active = True
         self.hit = False
         self.time = 0
         
-        # For smooth rotation
-        self.rotation = random.randint(0, 360)
-        self.rotation_speed = random.randint(-6, 6)
-        
         # For trail effect
-        self.positions = []
+        self.trail_start = 0
+        self.trail_count = 0
         
     def update(self):
         """Update fruit position and state"""
         if not self.active:
             return False
             
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.prev_rotation = self.rotation
+        
         # Physics
         self.x += self.speed_x
         self.y += self.speed_y
@@ -61,9 +163,13 @@ class Fruit:
         
         # Store positions for trail effect (store only every 3 frames)
         if self.game.frame_count % 3 == 0:
-            self.positions.append((self.x, self.y))
-            if len(self.positions) > 5:  # Keep only last 5 positions
-                self.positions.pop(0)
+            index = (self.trail_start + self.trail_count) % TRAIL_LENGTH
+            self.positions[index] = (self.x, self.y)
+            if self.trail_count < TRAIL_LENGTH:
+                self.trail_count += 1
+            else:
+                # Buffer is full, the oldest position was overwritten
+                self.trail_start = (self.trail_start + 1) % TRAIL_LENGTH
         
         # Check if fruit has gone off-screen
         if self.y > self.game.height + 100:
@@ -72,43 +178,34 @@ class Fruit:
             
         return True
         
-    def draw(self, surface):
-        """Draw the fruit on the screen"""
+    def draw(self, surface, alpha=1.0, dirty=None):
+        """Draw the fruit on the screen, alpha of the way from the previous step to the current one"""
         if not self.active:
             return
             
-        # Draw trail effect
-        if self.game.settings['show_trails'] and not self.hit:
-            for i, pos in enumerate(self.positions):
-                alpha = 100 - i * 20  # Fade out older positions
-                size_reduction = i * 5  # Make older positions smaller
-                
-                # Create a surface with per-pixel alpha
-                trail_img = self.image.copy()
-                trail_img.set_alpha(alpha)
-                trail_img = pygame.transform.scale(
-                    trail_img, 
-                    (self.image.get_width() - size_reduction, 
-                     self.image.get_height() - size_reduction)
-                )
-                trail_rect = trail_img.get_rect(center=(pos[0], pos[1]))
-                surface.blit(trail_img, trail_rect)
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        rotation = self.prev_rotation + (self.rotation - self.prev_rotation) * alpha
         
+        # Draw trail effect from the cached ghosts
+        if self.game.settings['show_trails'] and not self.hit:
+            draw_trail(surface, self.game, self.image, rotation,
+                       self.positions, self.trail_start, self.trail_count, dirty)
+            
         # Draw the fruit
         img = self.half_image if self.hit else self.image
-        # Rotate image
-        rotated_img = pygame.transform.rotate(img, self.rotation)
-        img_rect = rotated_img.get_rect(center=(self.x, self.y))
-        surface.blit(rotated_img, img_rect)
+        draw_rotated(surface, self.game, img, x, y, rotation, dirty)
         
-    def check_collision(self, pos):
-        """Check if the given position collides with this fruit"""
+    def check_collision(self, pos, prev_pos=None):
+        """Check if the blade moving from prev_pos to pos collides with this fruit"""
         if not self.active or self.hit:
             return False
             
-        # Simple circle collision
-        distance = math.sqrt((pos[0] - self.x)**2 + (pos[1] - self.y)**2)
-        return distance < 40  # Collision radius
+        # Circle against the swept blade segment, compared squared
+        if prev_pos is None:
+            prev_pos = pos
+        distance_sq = segment_distance_sq(self.x, self.y, prev_pos[0], prev_pos[1], pos[0], pos[1])
+        return distance_sq < COLLISION_RADIUS * COLLISION_RADIUS
         
     def slice(self):
         """Slice the fruit"""
@@ -118,21 +215,117 @@ class Fruit:
         self.hit = True
         
         # Change physics for sliced fruit
-        self.speed_x += random.randint(-5, 5)
-        self.speed_y -= 5
+        self.speed_x, self.speed_y = slice_speed(self.game.rng, self.speed_x, self.speed_y)
         
         return True
         
-class FruitManager:
-    """Manages all fruits in the game"""
+class FruitPool:
+    """Recycles fruits of one type instead of allocating a new one per spawn"""
+    
+    def __init__(self, game, name, is_bomb=False, capacity=64):
+        self.game = game
+        self.name = name
+        self.is_bomb = is_bomb
+        self.capacity = capacity
+        self.free = []
+        
+        # Statistics
+        self.created = 0
+        self.reused = 0
+        
+    def acquire(self):
+        """Get a freshly reset fruit"""
+        if self.free:
+            fruit = self.free.pop()
+            fruit.reset()
+            self.reused += 1
+            return fruit
+            
+        self.created += 1
+        return Fruit(self.game, self.name, self.is_bomb)
+        
+    def release(self, fruit):
+        """Return a fruit to the pool, dropping it if the pool is full"""
+        if len(self.free) < self.capacity:
+            self.free.append(fruit)
+            
+class BaseFruitManager:
+    """Spawning, scoring and combos shared by the fruit backends"""
     
     def __init__(self, game):
         self.game = game
-        self.fruits = []
         self.fruit_types = ['melon', 'orange', 'pomegranate', 'guava']
         self.spawn_timer = 0
-        self.combo_counter = 0
-        self.combo_timer = 0
+        self.combo_counters = [0] * game.players  # One combo per player
+        self.combo_timers = [0] * game.players
+        
+    def _update_combos(self):
+        """Count down the combo timers, ending the combos that ran out"""
+        timers = self.combo_timers
+        for player, timer in enumerate(timers):
+            if timer > 0:
+                timers[player] = timer - 1
+            else:
+                self.combo_counters[player] = 0
+                
+    def _draw_combo(self, surface, dirty=None):
+        """Draw the combo counters, side by side in the player colors with several players"""
+        players = self.game.players
+        for player, counter in enumerate(self.combo_counters):
+            # Draw combo counter if active
+            if counter > 1 and self.combo_timers[player] > 0:
+                # The shadow is baked in 2 pixels down and right of the text
+                color = PLAYER_COLORS[player] if players > 1 else (255, 255, 255)
+                combo_text = text_cache.render(f'Combo x{counter}!', 36, color, shadow=(0, 0, 0))
+                center_x = self.game.width * (player + 1) // (players + 1)
+                text_rect = combo_text.get_rect(center=(center_x + 1, 101))
+                rect = surface.blit(combo_text, text_rect)
+                if dirty is not None:
+                    dirty.append(rect)
+            
+    def sprite_images(self):
+        """Get every sprite a fruit or bomb can be drawn with"""
+        images = []
+        for name in self.fruit_types:
+            images.append(assets.image('images', 'fruits', f'{name}.png'))
+            images.append(assets.image('images', 'fruits', f'half_{name}.png'))
+        images.append(assets.image('images', 'fruits', 'bomb.png'))
+        images.append(assets.image('images', 'fruits', 'explosion.png'))
+        return images
+        
+    def check_collisions(self, pos, prev_pos=None):
+        """Check collisions of the blade swept from prev_pos to pos with all fruits"""
+        return tuple(self.check_blades([(0, pos, prev_pos)])[0])
+        
+    def _on_slice(self, is_bomb, x, y, pos, player=0):
+        """Add the effects, score and combo of the player for a sliced fruit or bomb"""
+        if is_bomb:
+            # Create explosion effect
+            self.game.effects.add_effect('explosion', x, y)
+        else:
+            # Create slice effect
+            self.game.effects.add_effect('slice', pos[0], pos[1])
+            # Add score
+            points = slice_points(self.combo_counters[player])
+            self.game.score += points
+            self.game.scores[player] += points
+            # Update combo
+            self.combo_counters[player] += 1
+            self.combo_timers[player] = SIM_RATE  # 1 second
+        
+    def _spawn_fruits(self):
+        """Spawn a random number of fruits"""
+        self.spawn_timer = spawn_wave(self.game.rng, self.game.difficulty, self.fruit_types, self._spawn)
+
+class FruitManager(BaseFruitManager):
+    """Manages all fruits in the game as pooled Fruit objects"""
+    
+    def __init__(self, game, pool_capacity=64):
+        super().__init__(game)
+        self.fruits = []
+        self.pools = {name: FruitPool(game, name, capacity=pool_capacity) for name in self.fruit_types}
+        self.pools['bomb'] = FruitPool(game, 'bomb', is_bomb=True, capacity=pool_capacity)
+        self.grid = SpatialHash()
         
     def update(self):
         """Update all fruits and spawn new ones"""
@@ -143,90 +336,83 @@ class FruitManager:
         if self.spawn_timer <= 0:
             self._spawn_fruits()
             
-        # Update combo timer
-        if self.combo_timer > 0:
-            self.combo_timer -= 1
-        else:
-            self.combo_counter = 0
+        self._update_combos()
             
-        # Update all active fruits
-        for fruit in self.fruits[:]:
-            if not fruit.update():
-                self.fruits.remove(fruit)
-                
-    def draw(self, surface):
-        """Draw all fruits"""
+        # Update all active fruits, compacting the list in place so
+        # expired fruits are removed in a single pass
+        fruits = self.fruits
+        alive = 0
+        for fruit in fruits:
+            if fruit.update():
+                fruits[alive] = fruit
+                alive += 1
+            else:
+                self.pools[fruit.name].release(fruit)
+        del fruits[alive:]
+        
+        # Index the new positions for the blade queries of the next frame
+        self.grid.clear()
+        for i, fruit in enumerate(fruits):
+            self.grid.insert(i, fruit.x, fruit.y)
+            
+    def clear(self):
+        """Return every fruit to its pool and reset the timers"""
         for fruit in self.fruits:
-            fruit.draw(surface)
-            
-        # Draw combo counter if active
-        if self.combo_counter > 1 and self.combo_timer > 0:
-            font = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 36)
-            combo_text = font.render(f'Combo x{self.combo_counter}!', True, (255, 255, 255))
-            text_rect = combo_text.get_rect(center=(self.game.width // 2, 100))
-            # Draw shadow
-            shadow_text = font.render(f'Combo x{self.combo_counter}!', True, (0, 0, 0))
-            shadow_rect = shadow_text.get_rect(center=(self.game.width // 2 + 2, 102))
-            surface.blit(shadow_text, shadow_rect)
-            surface.blit(combo_text, text_rect)
-            
-    def check_collisions(self, pos):
-        """Check collisions with all fruits"""
-        hit_fruit = False
-        hit_bomb = False
+            self.pools[fruit.name].release(fruit)
+        self.fruits = []
+        self.grid.clear()
+        self.spawn_timer = 0
+        self.combo_counters = [0] * self.game.players
+        self.combo_timers = [0] * self.game.players
         
+    def pool_stats(self):
+        """Get how many fruits each pool created and reused"""
+        return {
+            name: {'created': pool.created, 'reused': pool.reused, 'free': len(pool.free)}
+            for name, pool in self.pools.items()
+        }
+        
+    def draw(self, surface, alpha=1.0, dirty=None):
+        """Draw all fruits interpolated between the last two simulation steps"""
         for fruit in self.fruits:
-            if fruit.check_collision(pos):
-                if fruit.slice():
-                    if fruit.is_bomb:
-                        hit_bomb = True
-                        # Create explosion effect
-                        self.game.effects.add_effect('explosion', fruit.x, fruit.y)
-                    else:
-                        hit_fruit = True
-                        # Create slice effect
-                        self.game.effects.add_effect('slice', pos[0], pos[1])
-                        # Add score
-                        self.game.score += 1 + self.combo_counter // 2
-                        # Update combo
-                        self.combo_counter += 1
-                        self.combo_timer = 60  # 1 second at 60 FPS
-                        
-        return hit_fruit, hit_bomb
+            fruit.draw(surface, alpha, dirty)
+            
+        self._draw_combo(surface, dirty)
         
-    def _spawn_fruits(self):
-        """Spawn a random number of fruits"""
-        difficulty = self.game.difficulty
-        
-        # Determine how many fruits to spawn
-        base_count = {
-            'easy': 1,
-            'medium': 2,
-            'hard': 3
-        }[difficulty]
-        
-        count = base_count + random.randint(0, 1)
-        
-        # Spawn fruits
-        for _ in range(count):
-            fruit_type = random.choice(self.fruit_types)
-            self.fruits.append(Fruit(self.game, fruit_type))
-            
-        # Maybe spawn a bomb
-        bomb_chance = {
-            'easy': 0.1,
-            'medium': 0.2,
-            'hard': 0.3
-        }[difficulty]
-        
-        if random.random() < bomb_chance:
-            self.fruits.append(Fruit(self.game, 'bomb', is_bomb=True))
-            
-        # Reset spawn timer
-        base_timer = {
-            'easy': 90,
-            'medium': 60,
-            'hard': 45
-        }[difficulty]
-        
-        self.spawn_timer = base_timer + random.randint(-10, 10)
+    def check_blades(self, blades):
+        """Check the (player, pos, prev_pos) blades against all fruits, getting [hit_fruit, hit_bomb] per player"""
+        hits = {player: [False, False] for player, _, _ in blades}
+        blades = [(player, pos, pos if prev_pos is None else prev_pos) for player, pos, prev_pos in blades]
+        
+        # Only test each fruit against the blades passing its grid cells
+        query = self.grid.query_segment
+        if len(blades) == 1:
+            # A single blade needs no record of which blades reach a fruit
+            player, pos, prev_pos = blades[0]
+            for i in query(prev_pos[0], prev_pos[1], pos[0], pos[1], COLLISION_RADIUS):
+                fruit = self.fruits[i]
+                if fruit.check_collision(pos, prev_pos) and fruit.slice():
+                    self._on_slice(fruit.is_bomb, fruit.x, fruit.y, pos, player)
+                    hits[player][fruit.is_bomb] = True
+            return hits
+            
+        candidates = {}
+        for blade in blades:
+            _, pos, prev_pos = blade
+            for i in query(prev_pos[0], prev_pos[1], pos[0], pos[1], COLLISION_RADIUS):
+                candidates.setdefault(i, []).append(blade)
+        for i in sorted(candidates):
+            fruit = self.fruits[i]
+            # The first blade that touches a fruit slices it
+            for player, pos, prev_pos in candidates[i]:
+                if fruit.check_collision(pos, prev_pos):
+                    if fruit.slice():
+                        self._on_slice(fruit.is_bomb, fruit.x, fruit.y, pos, player)
+                        hits[player][fruit.is_bomb] = True
+                    break
+                    
+        return hits
+        
+    def _spawn(self, name):
+        """Add a new fruit or bomb of the given type"""
+        self.fruits.append(self.pools[name].acquire())
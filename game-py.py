@@ -4,28 +4,432 @@ import sys
 import time
 import random
 
-from src.fruit import FruitManager
-from src.ui import UI, EffectManager
+from src.assets import assets, rotations
+from src.fruit import FruitManager, TRAIL_LENGTH
+from src.ui import UI, EffectManager, PLAYER_COLORS
+from src.timestep import FixedTimestep, SIM_RATE
+from src.profiler import profiler
+from src.render import DirtyRenderer
+from src.viewport import Viewport
+from src.quality import QualityManager
+from src.startup import startup
+
+# Gameplay, collisions and the UI work in these pixels whatever the display size
+LOGICAL_SIZE = (800, 600)
+
+# Every image the game shows, decoded in parallel behind the loading screen
+PRELOAD = [
+    (('backgrounds', 'summer.jpg'), False),
+    (('backgrounds', 'winter.jpg'), False),
+    (('images', 'characters', 'professor.png'), True),
+    (('images', 'lives', 'white_lives.png'), True),
+    (('images', 'lives', 'red_lives.png'), True),
+    (('images', 'fruits', 'bomb.png'), True),
+    (('images', 'fruits', 'explosion.png'), True)
+] + [
+    (('images', 'fruits', f'{prefix}{name}.png'), True)
+    for name in ('melon', 'orange', 'pomegranate', 'guava') for prefix in ('', 'half_')
+]
 
 class FruitNinjaGame:
     """Main game class"""
     
-    def __init__(self, fullscreen=False, hand_tracker=None):
+    def __init__(self, fullscreen=False, hand_tracker=None, rotation_steps=0, prerotate=False,
+                 physics='objects', fps=60, seed=None, headless=False, script=None, dirty_rects=False,
+                 display_size=None, dynamic_resolution=False, adaptive_quality=False, players=1):
+        # Headless games render to an offscreen dummy display
+        self.headless = headless
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+            
         # Initialize pygame
         pygame.init()
         
         # Set up display
-        self.fullscreen = fullscreen
-        if fullscreen:
-            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-            self.width, self.height = self.screen.get_size()
+        self.fullscreen = fullscreen and not headless
+        if self.fullscreen:
+            display = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
         else:
-            self.width, self.height = 800, 600
-            self.screen = pygame.display.set_mode((self.width, self.height))
-        
+            display = pygame.display.set_mode(display_size or LOGICAL_SIZE)
+            
         pygame.display.set_caption('Fruit Ninja by MediaPie')
         
+        # Draw to a logical-resolution back buffer, scaled to the display when it is another size
+        self.width, self.height = LOGICAL_SIZE
+        self.viewport = Viewport(display, LOGICAL_SIZE, dynamic_resolution, budget=1 / (fps or 60))
+        self.screen = self.viewport.surface
+        
+        # Optionally redraw and present only the areas that changed while playing
+        if dirty_rects and self.viewport.scaled:
+            print("Dirty rects need the display at the logical resolution, presenting full frames")
+            dirty_rects = False
+        self.renderer = DirtyRenderer(self.screen) if dirty_rects else None
+        
+        # Decode all images in parallel while a loading screen shows, a kind
+        # of its own since it is part of the FruitNinjaGame init step
+        with startup.timed('preload', 'preload assets'):
+            self._preload()
+            
         # Load backgrounds
         self.backgrounds = {
-            'summer': pygame.image.load(os.path.join('assets', 'backgrounds', 'summer.jpg')),
-            
\ No newline at end of file
+            'summer': self._load_background('summer.jpg'),
+            'winter': self._load_background('winter.jpg')
+        }
+        self.background = self.backgrounds['summer']
+        
+        # Clock, the simulation runs at a fixed rate whatever the render FPS
+        self.clock = pygame.time.Clock()
+        self.fps = fps  # 0 renders as fast as possible
+        self.timestep = FixedTimestep()
+        self.frame_count = 0  # Simulation steps this round
+        
+        # Every simulation draw comes from this RNG, so a seed replays a round exactly
+        self.seed = seed
+        self.rng = random.Random(seed)
+        
+        # Scripted input replaces the mouse and hand tracker, driven by simulation step
+        self.script = script
+        
+        # Hand tracking
+        self.hand_tracker = hand_tracker
+        if self.hand_tracker:
+            self.hand_tracker.set_screen_dimensions(self.width, self.height)
+            
+        # Settings
+        self.settings = {
+            'show_trails': True,
+            'rotation_steps': rotation_steps,  # 0 rotates sprites every frame
+            'rotate_trails': False,  # Rotate trail ghosts too, needs rotation_steps
+            'trail_length': TRAIL_LENGTH,  # Ghosts drawn per trail
+            'effect_detail': 'full',  # 'low' draws thin slices and unblended explosions
+            'max_effects': None,  # Effects on screen at once, None for no cap
+            'show_profiler': False  # Frame time overlay, F3 toggles it
+        }
+        
+        # Optionally lower the settings above while frames go over budget
+        self.quality = QualityManager(self.settings, budget=1 / (fps or 60)) if adaptive_quality else None
+        
+        # Game state
+        self.state = 'start'  # start, playing, game_over
+        self.score = 0
+        self.lives = 3
+        self.difficulty = 'easy'
+        self.game_duration = 60  # Seconds
+        self.time_left = self.game_duration
+        self.fact_rect = None
+        self.was_clicking = False
+        
+        # Players, each slicing with one tracked hand
+        if not 1 <= players <= len(PLAYER_COLORS):
+            raise ValueError(f"Between 1 and {len(PLAYER_COLORS)} players are supported")
+        self.players = players
+        self.scores = [0] * players  # score is their total
+        self.hand_players = {}  # Stable hand ID -> player
+        self.blades = []  # (hand ID, player, position, pressed) read in the last update
+        self.blade_pos = {}  # Blade position of each hand last frame while slicing
+        
+        # Game components
+        if physics == 'numpy':
+            from src.physics import ArrayFruitManager
+            self.fruit_manager = ArrayFruitManager(self)
+        else:
+            self.fruit_manager = FruitManager(self)
+        self.effects = EffectManager(self)
+        self.ui = UI(self)
+        
+        # Render every rotation before the first frame instead of on first use
+        if rotation_steps and prerotate:
+            rotations.prerender(self.fruit_manager.sprite_images(), rotation_steps)
+            
+        self.running = True
+        
+    def _preload(self):
+        """Decode every image on a thread pool, drawing a progress bar until they are all in"""
+        pending = assets.preload(PRELOAD)
+        total = len(pending)
+        while pending:
+            pending = assets.install(pending)
+            self._draw_loading(1 - len(pending) / total)
+            pygame.event.pump()
+            if pending:
+                time.sleep(0.005)
+        for key, seconds in assets.load_times.items():
+            startup.add('decode', key, seconds)
+            
+    def _draw_loading(self, progress):
+        """Draw a minimal loading screen, no assets needed"""
+        self.screen.fill((20, 20, 30))
+        bar = pygame.Rect(0, 0, self.width // 2, 16)
+        bar.center = (self.width // 2, self.height // 2)
+        pygame.draw.rect(self.screen, (255, 255, 255), bar, 2)
+        pygame.draw.rect(self.screen, (255, 150, 0), (bar.x + 3, bar.y + 3, int((bar.width - 6) * progress), bar.height - 6))
+        self.viewport.present()
+        
+    def _load_background(self, filename):
+        """Get a background from the asset cache scaled to the screen"""
+        image = assets.image('backgrounds', filename, alpha=False)
+        return pygame.transform.scale(image, (self.width, self.height))
+        
+    def reset_game(self):
+        """Start a new round"""
+        self.score = 0
+        self.scores = [0] * self.players
+        self.lives = 3
+        self.difficulty = 'easy'
+        self.frame_count = 0
+        self.time_left = self.game_duration
+        self.fruit_manager.clear()  # Keeps the fruit pools warm
+        self.blade_pos = {}
+        self.effects = EffectManager(self)
+        self.state = 'playing'
+        
+    def get_cursor(self):
+        """Get the cursor position and whether it is pressed"""
+        if self.script:
+            return self.script.cursor(self.frame_count, self.width, self.height)
+        if self.hand_tracker:
+            return self.hand_tracker.get_cursor_position(), self.hand_tracker.is_cursor_down()
+        return self.viewport.to_logical(pygame.mouse.get_pos()), pygame.mouse.get_pressed()[0]
+        
+    def get_blades(self):
+        """Get (hand ID, player, position, pressed) for the blade of every player in view"""
+        if self.players == 1 or not self.hand_tracker:
+            pos, down = self.get_cursor()
+            return [(0, 0, pos, down)]
+            
+        # A hand keeps its player while it is tracked, new hands take the first free one
+        hands = self.hand_tracker.get_hands()
+        tracked = set(hand.hand_id for hand in hands)
+        for hand_id in list(self.hand_players):
+            if hand_id not in tracked:
+                del self.hand_players[hand_id]
+                
+        # Hands missing from the last detection have no blade, and give up
+        # their player when a hand in view has none left
+        missing = [hand.hand_id for hand in hands if hand.missed and hand.hand_id in self.hand_players]
+        blades = []
+        for hand in hands:
+            if hand.missed:
+                continue
+            player = self.hand_players.get(hand.hand_id)
+            if player is None:
+                taken = set(self.hand_players.values())
+                free = [p for p in range(self.players) if p not in taken]
+                if free:
+                    player = free[0]
+                elif missing:
+                    player = self.hand_players.pop(missing.pop(0))
+                else:
+                    continue
+                self.hand_players[hand.hand_id] = player
+            blades.append((hand.hand_id, player, hand.cursor_pos, hand.is_clicking))
+        return blades
+        
+    def handle_events(self):
+        """Handle pygame events"""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.running = False
+                elif event.key == pygame.K_t:
+                    self.settings['show_trails'] = not self.settings['show_trails']
+                elif event.key == pygame.K_F3:
+                    # The overlay needs the timers, start them the first time it is shown
+                    self.settings['show_profiler'] = not self.settings['show_profiler']
+                    if self.settings['show_profiler'] and not profiler.enabled:
+                        profiler.enable()
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.handle_click(self.viewport.to_logical(event.pos))
+                
+        # The hand tracker clicks by raising the thumb
+        if self.hand_tracker:
+            pos, clicking = self.get_cursor()
+            if clicking and not self.was_clicking:
+                self.handle_click(pos)
+            self.was_clicking = clicking
+            
+    def handle_click(self, pos):
+        """Handle a click on the menu screens"""
+        # Any click dismisses the current fact
+        if self.fact_rect:
+            self.fact_rect = None
+            return
+            
+        if self.state == 'start':
+            if self.ui.check_button_click('summer', pos):
+                self.background = self.backgrounds['summer']
+                self.reset_game()
+            elif self.ui.check_button_click('winter', pos):
+                self.background = self.backgrounds['winter']
+                self.reset_game()
+            elif self.ui.professor_rect.collidepoint(pos):
+                self.draw()
+                self.fact_rect = self.ui.display_random_fact(self.screen)
+                self.present()
+        elif self.state == 'game_over':
+            if self.ui.check_button_click('play_again', pos):
+                self.state = 'start'
+                
+    def update(self):
+        """Update the game state"""
+        if self.state != 'playing':
+            # The menus still show where the hands are
+            self.blades = self.get_blades()
+            return
+            
+        self.frame_count += 1
+        self.blades = self.get_blades()
+        
+        # Slice fruits along the paths the hands moved since the last frame,
+        # all players against all fruits in one pass. A hand that left the
+        # view drops out here, so a new hand never continues its path.
+        blades = [(player, pos, self.blade_pos.get(hand_id)) for hand_id, player, pos, down in self.blades if down]
+        self.blade_pos = {hand_id: pos for hand_id, _, pos, down in self.blades if down}
+        if blades:
+            for hit_fruit, hit_bomb in self.fruit_manager.check_blades(blades).values():
+                if hit_bomb:
+                    self.lives -= 1
+                
+        with profiler.scope('fruits.update'):
+            self.fruit_manager.update()
+        with profiler.scope('effects.update'):
+            self.effects.update()
+        
+        # Difficulty goes up with the score
+        if self.score >= 30:
+            self.difficulty = 'hard'
+        elif self.score >= 15:
+            self.difficulty = 'medium'
+            
+        # Check for game over, the round clock counts simulation steps
+        self.time_left = max(0, self.game_duration - self.frame_count // SIM_RATE)
+        if self.lives <= 0 or self.time_left <= 0:
+            self.state = 'game_over'
+            
+    def draw(self, alpha=1.0):
+        """Draw the current screen, alpha of the way between the last two simulation steps"""
+        # Rects drawn this frame for the dirty rect renderer, menus are always redrawn in full
+        dirty = None
+        if self.state == 'start':
+            self.ui.draw_start_screen(self.screen)
+        elif self.state == 'playing':
+            with profiler.scope('draw.world'):
+                if self.renderer:
+                    dirty = []
+                    self.renderer.restore(self.background)
+                else:
+                    self.screen.blit(self.background, (0, 0))
+                self.fruit_manager.draw(self.screen, alpha, dirty)
+                self.effects.draw(self.screen, dirty)
+                
+            # HUD
+            with profiler.scope('draw.ui'):
+                self.ui.draw_score(self.screen, self.score, dirty)
+                self.ui.draw_timer(self.screen, self.time_left, dirty)
+                if self.players > 1:
+                    self.ui.draw_player_scores(self.screen, self.scores, dirty)
+                self.ui.draw_lives(self.screen, self.lives, dirty)
+                self.ui.draw_difficulty(self.screen, self.difficulty, dirty)
+        elif self.state == 'game_over':
+            self.ui.draw_game_over_screen(self.screen, self.score, self.scores)
+            
+        # Show where the hands are pointing
+        if self.hand_tracker:
+            if self.players == 1:
+                cursors = [((255, 255, 255), self.get_cursor()[0])]
+            else:
+                cursors = [(PLAYER_COLORS[player], pos) for _, player, pos, _ in self.blades]
+            for color, pos in cursors:
+                rect = pygame.draw.circle(self.screen, color, pos, 10, 2)
+                if dirty is not None:
+                    dirty.append(rect)
+                
+        if self.renderer:
+            if dirty is None:
+                self.renderer.invalidate()
+            else:
+                self.renderer.mark(dirty)
+                
+    def present(self):
+        """Show the drawn frame on the display"""
+        if self.renderer:
+            self.renderer.present()
+        else:
+            self.viewport.present()
+            
+    def run(self):
+        """Main game loop"""
+        self.timestep.reset()
+        while self.running:
+            profiler.frame()
+            with profiler.scope('input'):
+                self.handle_events()
+                
+            # Run as many fixed simulation steps as real time has passed
+            for _ in range(self.timestep.advance()):
+                self.update()
+                
+            # Keep the fact box on screen until it is dismissed
+            if not self.fact_rect:
+                self.draw(self.timestep.alpha)
+                if self.settings['show_profiler']:
+                    rect = profiler.draw_overlay(self.screen)
+                    if self.renderer:
+                        self.renderer.mark([rect])
+                with profiler.scope('flip'):
+                    self.present()
+                startup.first_frame()
+                
+            self.clock.tick(self.fps)
+            work_time = self.clock.get_rawtime() / 1000  # Without the wait
+            self.viewport.govern(work_time)
+            if self.quality:
+                self.quality.update(work_time)
+            
+        # Clean up
+        if self.quality:
+            self.quality.report()
+        if self.hand_tracker:
+            self.hand_tracker.cleanup()
+        pygame.quit()
+        sys.exit()
+        
+    def run_headless(self, rounds=1, render=True, max_steps=None):
+        """Play whole rounds as fast as the CPU allows and return the stats"""
+        steps = 0
+        scores = []
+        draw_time = 0.0
+        start = time.perf_counter()
+        for _ in range(rounds):
+            self.reset_game()
+            while self.state == 'playing' and (max_steps is None or steps < max_steps):
+                pygame.event.pump()  # Keep SDL responsive without handling input
+                self.update()
+                steps += 1
+                if render:
+                    draw_start = time.perf_counter()
+                    self.draw()
+                    self.present()
+                    draw_time += time.perf_counter() - draw_start
+                # Headless runs count the first finished step as the first frame
+                startup.first_frame()
+            scores.append(self.score)
+            # The step budget ran out partway through this round
+            if max_steps is not None and steps >= max_steps:
+                break
+        elapsed = time.perf_counter() - start
+        
+        return {
+            'seed': self.seed,
+            'rounds': len(scores),
+            'scores': scores,
+            'lives': self.lives,
+            'steps': steps,
+            'seconds': elapsed,
+            'steps_per_second': steps / elapsed if elapsed else 0.0,
+            'speedup': steps / SIM_RATE / elapsed if elapsed else 0.0,  # Game seconds per real second
+            'draw_seconds': draw_time
+        }
@@ -0,0 +1,261 @@
+import cv2
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import threading
+import time
+
+from src.tracking import TrackerSnapshot, HandState
+from src.filters import PassThrough
+from src.sources import CameraSource
+from src.profiler import profiler
+
+FRAME_SHAPE = (480, 640, 3)
+RING_SIZE = 3  # Enough for one frame being read, one published and one being written
+
+# Layout of the shared control block (float64 fields)
+FRAME_SEQ = 0       # Incremented for every published frame
+FRAME_SLOT = 1      # Ring slot of the newest frame
+FRAME_TIME = 2      # Capture time of the newest frame
+READING_SLOT = 3    # Slot the worker is running detection on, -1 if none
+CLAIMED_SEQ = 4     # Sequence number of the last frame the worker took
+RESULT_SEQ = 5      # Incremented for every published result
+TIP_X = 6           # Index fingertip in camera pixels
+TIP_Y = 7
+CLICKING = 8
+RESULT_CAPTURE_TIME = 9
+RESULT_TIME = 10
+CONTROL_FIELDS = 11
+
+def _inference_worker(frames_name, control_name, lock, stop):
+    """Run hand detection on frames from shared memory in a separate process"""
+    from cvzone.HandTrackingModule import HandDetector
+    detector = HandDetector(detectionCon=0.65, maxHands=1)
+    
+    frames_shm = shared_memory.SharedMemory(name=frames_name)
+    control_shm = shared_memory.SharedMemory(name=control_name)
+    frames = np.ndarray((RING_SIZE,) + FRAME_SHAPE, dtype=np.uint8, buffer=frames_shm.buf)
+    control = np.ndarray((CONTROL_FIELDS,), dtype=np.float64, buffer=control_shm.buf)
+    
+    last_seq = 0
+    try:
+        while not stop.is_set():
+            # Claim the newest frame so the capture side won't overwrite it
+            with lock:
+                seq = control[FRAME_SEQ]
+                if seq != last_seq:
+                    slot = int(control[FRAME_SLOT])
+                    capture_time = control[FRAME_TIME]
+                    control[READING_SLOT] = slot
+                    control[CLAIMED_SEQ] = seq
+            if seq == last_seq:
+                time.sleep(0.002)
+                continue
+            last_seq = seq
+            
+            # Detect straight from the shared buffer, no copy
+            hands = detector.findHands(frames[slot], draw=False)
+            
+            with lock:
+                control[READING_SLOT] = -1
+                if hands:
+                    hand = hands[0]
+                    fingers = detector.fingersUp(hand)
+                    control[TIP_X] = hand['lmList'][8][0]
+                    control[TIP_Y] = hand['lmList'][8][1]
+                    control[CLICKING] = 1 if fingers and len(fingers) >= 5 and fingers[4] == 1 else 0
+                    control[RESULT_CAPTURE_TIME] = capture_time
+                    control[RESULT_TIME] = time.perf_counter()
+                    control[RESULT_SEQ] += 1
+    finally:
+        del frames, control
+        frames_shm.close()
+        control_shm.close()
+
+class ProcessHandTracker:
+    """HandTracker that runs detection in a separate process fed through shared memory"""
+    
+    def __init__(self, cursor_filter=None, source=None):
+        # Frames come from the camera unless another frame source is given
+        self.source = source or CameraSource()
+        if self.source.landmarks:
+            raise ValueError("The process tracker needs a frame source, replay landmarks with HandTracker")
+        self.cam_w, self.cam_h = FRAME_SHAPE[1], FRAME_SHAPE[0]
+        self.finished = False
+        
+        # Screen dimensions (will be updated by the game)
+        self.screen_w, self.screen_h = 800, 600
+        
+        # Preallocated frame ring and control block shared with the worker
+        frame_bytes = int(np.prod(FRAME_SHAPE))
+        self.frames_shm = shared_memory.SharedMemory(create=True, size=RING_SIZE * frame_bytes)
+        self.control_shm = shared_memory.SharedMemory(create=True, size=CONTROL_FIELDS * 8)
+        self.frames = np.ndarray((RING_SIZE,) + FRAME_SHAPE, dtype=np.uint8, buffer=self.frames_shm.buf)
+        self.control = np.ndarray((CONTROL_FIELDS,), dtype=np.float64, buffer=self.control_shm.buf)
+        self.control[:] = 0
+        self.control[READING_SLOT] = -1
+        
+        # Latest tracking result
+        self.snapshot = TrackerSnapshot((0, 0), False, 0, 0)
+        self.result_seq = 0
+        self.cursor_filter = cursor_filter or PassThrough()
+        
+        # Statistics
+        self.captured = 0
+        self.dropped = 0
+        
+        # Start the worker, spawned so it doesn't inherit the pygame state
+        context = mp.get_context('spawn')
+        self.lock = context.Lock()
+        self.stop = context.Event()
+        self.process = context.Process(
+            target=_inference_worker,
+            args=(self.frames_shm.name, self.control_shm.name, self.lock, self.stop)
+        )
+        self.process.daemon = True
+        self.process.start()
+        
+        # Capture frames in a separate thread
+        self.running = True
+        self.failed = False
+        self.thread = threading.Thread(target=self._capture_frames)
+        self.thread.daemon = True
+        self.thread.start()
+        
+    def _record(self, stage, start):
+        """Add a stage that ran from start until now to the profiler, getting the end time"""
+        end = time.perf_counter()
+        profiler.record('tracker.' + stage, start, end)
+        return end
+        
+    def _capture_frames(self):
+        """Read camera frames straight into the shared ring in a separate thread"""
+        while self.running:
+            if not self.process.is_alive():
+                # Worker crashed, stop feeding it and keep the last result
+                print(f"Hand tracking worker exited with code {self.process.exitcode}")
+                self.failed = True
+                self.running = False
+                break
+                
+            # Pick a slot that is neither being read nor the newest frame.
+            # A timeout guards against a worker that died holding the lock.
+            if not self.lock.acquire(timeout=0.5):
+                continue
+            busy = (self.control[READING_SLOT], self.control[FRAME_SLOT])
+            self.lock.release()
+            slot = next(s for s in range(RING_SIZE) if s not in busy)
+            
+            start = time.perf_counter()
+            success, img = self.source.read()
+            if not success:
+                if self.source.finished:
+                    self.finished = True
+                    break
+                # If camera read fails, try again
+                time.sleep(0.1)
+                continue
+            capture_time = time.perf_counter()
+            start = self._record('capture', start)
+            
+            # The shared ring holds fixed size frames
+            if img.shape != FRAME_SHAPE:
+                img = cv2.resize(img, (self.cam_w, self.cam_h))
+            
+            # Flip image for mirror effect, written directly into shared memory
+            cv2.flip(img, 1, dst=self.frames[slot])
+            self._record('flip', start)
+            
+            # Offline sources wait until the worker took the previous frame, so none is lost
+            while (not self.source.realtime and self.running and self.process.is_alive()
+                   and self.control[CLAIMED_SEQ] < self.control[FRAME_SEQ]):
+                time.sleep(0.002)
+                
+            start = time.perf_counter()
+            if not self.lock.acquire(timeout=0.5):
+                continue
+            # The previous frame is replaced before the worker took it
+            if self.control[CLAIMED_SEQ] < self.control[FRAME_SEQ]:
+                self.dropped += 1
+            self.control[FRAME_SLOT] = slot
+            self.control[FRAME_TIME] = capture_time
+            self.control[FRAME_SEQ] += 1
+            self.lock.release()
+            self.captured += 1
+            self._record('publish', start)
+            
+    def _poll(self):
+        """Pick up the newest result from the worker"""
+        if self.control[RESULT_SEQ] == self.result_seq:
+            return self.snapshot
+            
+        # Never block the game loop, keep the old result if the lock is busy
+        if not self.lock.acquire(timeout=0.005):
+            return self.snapshot
+        self.result_seq = self.control[RESULT_SEQ]
+        ind_x, ind_y = self.control[TIP_X], self.control[TIP_Y]
+        is_clicking = bool(self.control[CLICKING] == 1)
+        capture_time = float(self.control[RESULT_CAPTURE_TIME])
+        inference_time = float(self.control[RESULT_TIME])
+        self.lock.release()
+        
+        # Convert coordinates to screen space
+        conv_x = int(np.interp(ind_x, (0, self.cam_w), (0, self.screen_w)))
+        conv_y = int(np.interp(ind_y, (0, self.cam_h), (0, self.screen_h)))
+        self.snapshot = TrackerSnapshot((conv_x, conv_y), is_clicking, capture_time, inference_time)
+        self.cursor_filter.update((conv_x, conv_y), capture_time)
+        return self.snapshot
+        
+    def get_stats(self):
+        """Get frame counters for tuning the capture/inference pipeline"""
+        return {
+            'captured': self.captured,
+            'results': int(self.control[RESULT_SEQ]),
+            'dropped': self.dropped,
+            'worker_alive': self.process.is_alive()
+        }
+        
+    def get_snapshot(self):
+        """Get the latest tracking result"""
+        return self._poll()
+        
+    def get_cursor_position(self):
+        """Get the filtered cursor position predicted for the current time"""
+        snapshot = self._poll()
+        pos = self.cursor_filter.sample(time.perf_counter())
+        if pos is None:
+            return snapshot.cursor_pos
+        return int(round(pos[0])), int(round(pos[1]))
+        
+    def is_cursor_down(self):
+        """Check if the cursor is clicking"""
+        return self._poll().is_clicking
+        
+    def get_hands(self):
+        """Get the one tracked hand as a HandState, the worker detects a single hand"""
+        return [HandState(0, self.get_cursor_position(), self.is_cursor_down())]
+        
+    def set_screen_dimensions(self, width, height):
+        """Update screen dimensions for coordinate conversion"""
+        self.screen_w = width
+        self.screen_h = height
+        self.cursor_filter.reset()
+        
+    def cleanup(self):
+        """Clean up resources"""
+        self.running = False
+        self.stop.set()
+        if self.thread.is_alive():
+            self.thread.join(1.0)  # Wait for thread to finish
+        self.process.join(2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1.0)
+        self.source.release()
+        
+        # Release the shared memory
+        del self.frames, self.control
+        self.frames_shm.close()
+        self.frames_shm.unlink()
+        self.control_shm.close()
+        self.control_shm.unlink()
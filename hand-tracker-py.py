@@ -3,89 +3,331 @@ import numpy as np
 from cvzone.HandTrackingModule import HandDetector
 import threading
 import time
+import copy
+
+from src.tracking import TrackerSnapshot, HandState, LatestFrame, HandTracks
+from src.filters import PassThrough
+from src.sources import CameraSource, LandmarkRecorder
+from src.profiler import profiler
+
+STAGES = ('capture', 'flip', 'detect', 'track', 'convert')
 
 class HandTracker:
     """Tracks hand movements using webcam and controls the game cursor"""
     
-    def __init__(self):
-        # Initialize camera
-        self.cap = cv2.VideoCapture(0)
-        self.cam_w, self.cam_h = 640, 480
-        self.cap.set(3, self.cam_w)
-        self.cap.set(4, self.cam_h)
+    def __init__(self, preview=False, preview_fps=10, detect_interval=1, detect_scale=1.0,
+                 detection_confidence=0.65, max_flow_error=20.0, roi_size=48, cursor_filter=None,
+                 source=None, record_path=None, max_hands=1):
+        # Frames come from the camera unless another source is given. Landmark
+        # replays stand in for capture and detection and feed the rest as is.
+        self.source = source or CameraSource()
+        self.cam_w, self.cam_h = self.source.size
+        self.finished = False  # Set when a file source runs out
         
         # Initialize hand detector
-        self.detector = HandDetector(detectionCon=0.65, maxHands=1)
+        self.max_hands = max_hands
+        self.detector = None
+        if not self.source.landmarks:
+            self.detector = HandDetector(detectionCon=detection_confidence, maxHands=max_hands)
+            
+        # Optionally save every detection for replay
+        self.recorder = LandmarkRecorder(record_path) if record_path else None
+        
+        # Detect-then-track: run the full detector every detect_interval frames
+        # or when tracking is lost, and follow the fingertip with optical flow
+        # on a small region around it in between. Optical flow follows one
+        # fingertip, so several hands are detected on every frame.
+        self.detect_interval = 1 if self.source.landmarks or max_hands > 1 else detect_interval
+        self.detect_scale = detect_scale  # Downscale factor for detector input
+        self.max_flow_error = max_flow_error
+        self.roi_size = roi_size  # Half size of the optical flow region
+        self.tip = None  # Fingertip in camera pixels, None when lost
+        self.prev_gray = None
+        self.frames_since_detect = 0
+        self.detect_hits = 0
+        self.detect_misses = 0
+        self.track_hits = 0
+        self.track_misses = 0
         
         # Screen dimensions (will be updated by the game)
         self.screen_w, self.screen_h = 800, 600
         
-        # Current hand position
-        self.cursor_pos = (0, 0)
-        self.is_clicking = False
+        # Latest tracking result
+        self.snapshot = TrackerSnapshot((0, 0), False, 0, 0)
+        
+        # Smooths the raw positions and predicts them forward to the time the
+        # game samples the cursor, shared between the tracking and game threads
+        self.cursor_filter = cursor_filter or PassThrough()
+        self.filter_lock = threading.Lock()
+        
+        # With several hands each one gets a stable ID and a fresh copy of the
+        # filter, copied from one taken before any position went in
+        filter_template = copy.deepcopy(self.cursor_filter)
+        filter_template.reset()
+        self.tracks = HandTracks(lambda: copy.deepcopy(filter_template))
+        
+        # Average seconds spent in each stage of the tracking loop
+        self.timings = {stage: 0.0 for stage in STAGES}
+        self.frames = 0
+        self.queue_age = 0.0  # Average seconds a frame waits before inference
+        
+        # Optional debug window, drawn on its own thread at a limited rate.
+        # Without it the tracker is headless and never draws landmarks.
+        self.preview = preview and not self.source.landmarks
+        self.preview_interval = 1.0 / preview_fps
+        self.preview_frame = None
+        self.next_preview = 0
         
-        # Start tracking in a separate thread
+        # Capture and inference run on separate threads joined by a one-slot
+        # buffer, so inference always works on the newest frame
+        self.latest = LatestFrame()
         self.running = True
+        self.capture_thread = threading.Thread(target=self._capture_frames)
+        self.capture_thread.daemon = True
+        self.capture_thread.start()
         self.thread = threading.Thread(target=self._track_hands)
         self.thread.daemon = True
         self.thread.start()
         
-    def _track_hands(self):
-        """Track hands in a separate thread"""
+        if self.preview:
+            self.preview_thread = threading.Thread(target=self._show_preview)
+            self.preview_thread.daemon = True
+            self.preview_thread.start()
+            
+    def _record(self, stage, start):
+        """Add the time since start to the running average of a stage"""
+        end = time.perf_counter()
+        elapsed = end - start
+        self.timings[stage] += (elapsed - self.timings[stage]) * 0.1
+        profiler.record('tracker.' + stage, start, end)
+        return time.perf_counter()
+        
+    def _capture_frames(self):
+        """Read and mirror frames from the source in a separate thread"""
         while self.running:
-            success, img = self.cap.read()
+            start = time.perf_counter()
+            success, img = self.source.read()
             if not success:
+                if self.source.finished:
+                    self.finished = True
+                    break
                 # If camera read fails, try again
                 time.sleep(0.1)
                 continue
+            # Replays stamp each sample themselves
+            capture_time = self.source.capture_time if self.source.landmarks else time.perf_counter()
+            start = self._record('capture', start)
+            
+            # Flip image for mirror effect, recorded landmarks already are
+            if not self.source.landmarks:
+                img = cv2.flip(img, 1)
+                self._record('flip', start)
                 
-            # Flip image for mirror effect
-            img = cv2.flip(img, 1)
+            self.latest.put(img, capture_time, wait=not self.source.realtime)
             
-            # Find hands
-            hands, img = self.detector.findHands(img)
+    def _track_hands(self):
+        """Track hands on the newest captured frame in a separate thread"""
+        is_clicking = False
+        while self.running:
+            img, capture_time = self.latest.take()
+            if img is None:
+                continue
+            start = time.perf_counter()
+            self.queue_age += (start - capture_time - self.queue_age) * 0.1
             
-            if hands:
-                # Get position of index finger tip
-                hand = hands[0]
-                lmlist = hand['lmList']
-                ind_x, ind_y = lmlist[8][0], lmlist[8][1]
+            # Follow the fingertip cheaply between detections
+            gray = None
+            tip = None
+            if self.detect_interval > 1:
+                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+                if self.tip is not None and self.frames_since_detect < self.detect_interval:
+                    tip = self._follow(gray)
+                    if tip is None:
+                        self.track_misses += 1
+                    else:
+                        self.track_hits += 1
+                start = self._record('track', start)
                 
-                # Convert coordinates to screen space
-                conv_x = int(np.interp(ind_x, (0, self.cam_w), (0, self.screen_w)))
-                conv_y = int(np.interp(ind_y, (0, self.cam_h), (0, self.screen_h)))
+            # Fall back to the full detector on schedule or when tracking is lost
+            show = self.preview and start >= self.next_preview
+            hand = None
+            if tip is None:
+                hands, img = self._detect(img, show)
+                hand = hands[0] if hands else None
+                self.frames_since_detect = 0
+                if self.max_hands > 1:
+                    self._track_all(hands, capture_time)
+                if hand:
+                    self.detect_hits += 1
+                    tip = hand['lmList'][8][0], hand['lmList'][8][1]
+                    fingers = hand['fingers'] if 'fingers' in hand else self.detector.fingersUp(hand)
+                else:
+                    self.detect_misses += 1
+                    fingers = None
+                if self.recorder:
+                    self.recorder.write(capture_time, hand, fingers)
+                start = self._record('detect', start)
+            self.frames_since_detect += 1
+            self.tip = tip
+            self.prev_gray = gray
+            
+            if tip is not None:
+                conv_x, conv_y = self._to_screen(tip)
                 
-                # Update cursor position
-                self.cursor_pos = (conv_x, conv_y)
+                # Check if thumb is up (for clicking), kept while only tracking
+                if hand:
+                    is_clicking = self._is_clicking(fingers)
+                    
+                # Publish position and click state together
+                self.snapshot = TrackerSnapshot((conv_x, conv_y), is_clicking, capture_time, time.perf_counter())
+                with self.filter_lock:
+                    self.cursor_filter.update((conv_x, conv_y), capture_time)
+            self._record('convert', start)
+            self.frames += 1
+            
+            # Hand the frame over to the preview thread
+            if show:
+                if hand is None and tip is not None:
+                    # Mark the point optical flow is following
+                    cv2.circle(img, (int(tip[0]), int(tip[1])), 8, (0, 255, 0), 2)
+                self.preview_frame = img
+                self.next_preview = start + self.preview_interval
                 
-                # Check if thumb is up (for clicking)
-                fingers = self.detector.fingersUp(hand)
-                if fingers and len(fingers) >= 5:
-                    self.is_clicking = fingers[4] == 1
-                else:
-                    self.is_clicking = False
+    def _to_screen(self, tip):
+        """Convert a fingertip in camera pixels to screen space"""
+        conv_x = int(np.interp(tip[0], (0, self.cam_w), (0, self.screen_w)))
+        conv_y = int(np.interp(tip[1], (0, self.cam_h), (0, self.screen_h)))
+        return conv_x, conv_y
+        
+    def _is_clicking(self, fingers):
+        """Check if the thumb is up"""
+        return bool(fingers and len(fingers) >= 5 and fingers[4] == 1)
+        
+    def _track_all(self, hands, capture_time):
+        """Match every detected hand to its stable ID and filter"""
+        detected = []
+        for hand in hands:
+            fingers = hand['fingers'] if 'fingers' in hand else self.detector.fingersUp(hand)
+            detected.append((self._to_screen(hand['lmList'][8][:2]), self._is_clicking(fingers)))
+        with self.filter_lock:
+            self.tracks.update(detected, capture_time)
+            
+    def _detect(self, img, draw):
+        """Run the full hand detector, returning the hands in full frame pixels and the image"""
+        # Replayed landmarks arrive already detected
+        if self.source.landmarks:
+            return (img or []), None
+            
+        small = img
+        if self.detect_scale != 1.0:
+            small = cv2.resize(img, None, fx=self.detect_scale, fy=self.detect_scale,
+                               interpolation=cv2.INTER_AREA)
+            
+        # Find hands, only drawing landmarks on frames the preview will show
+        if draw:
+            hands, small = self.detector.findHands(small)
+            img = small
+        else:
+            hands = self.detector.findHands(small, draw=False)
             
-            # Display window (debug mode)
-            cv2.imshow("Hand Tracker", img)
+        if not hands:
+            return [], img
+        if self.detect_scale != 1.0:
+            for hand in hands:
+                hand['lmList'] = [[lm[0] / self.detect_scale, lm[1] / self.detect_scale] + list(lm[2:])
+                                  for lm in hand['lmList']]
+        return hands, img
+        
+    def _follow(self, gray):
+        """Track the fingertip with pyramidal optical flow in a small region, None if lost"""
+        # Crop the same region around the last fingertip from both frames
+        x, y = int(self.tip[0]), int(self.tip[1])
+        left = max(0, x - self.roi_size)
+        top = max(0, y - self.roi_size)
+        right = min(gray.shape[1], x + self.roi_size)
+        bottom = min(gray.shape[0], y + self.roi_size)
+        if right - left < 8 or bottom - top < 8:
+            return None
+        prev_roi = self.prev_gray[top:bottom, left:right]
+        roi = gray[top:bottom, left:right]
+        
+        point = np.array([[[self.tip[0] - left, self.tip[1] - top]]], dtype=np.float32)
+        new_point, status, error = cv2.calcOpticalFlowPyrLK(
+            prev_roi, roi, point, None, winSize=(15, 15), maxLevel=2)
+        if not status[0][0] or error[0][0] > self.max_flow_error:
+            return None
+        return new_point[0][0][0] + left, new_point[0][0][1] + top
+        
+    def _show_preview(self):
+        """Show the latest annotated frame in a debug window"""
+        while self.running:
+            img = self.preview_frame
+            if img is not None:
+                self.preview_frame = None
+                cv2.imshow("Hand Tracker", img)
             cv2.waitKey(1)
+            time.sleep(self.preview_interval)
             
+    def get_timings(self):
+        """Get the average milliseconds spent in each tracking stage"""
+        return {stage: seconds * 1000 for stage, seconds in self.timings.items()}
+        
+    def get_stats(self):
+        """Get frame counters for tuning the capture/inference pipeline"""
+        return {
+            'captured': self.latest.written,
+            'processed': self.frames,
+            'dropped': self.latest.dropped,
+            'queue_age_ms': self.queue_age * 1000,
+            'detect_hits': self.detect_hits,
+            'detect_misses': self.detect_misses,
+            'track_hits': self.track_hits,
+            'track_misses': self.track_misses,
+            'finished': self.finished
+        }
+        
+    def get_snapshot(self):
+        """Get the latest tracking result"""
+        return self.snapshot
+        
     def get_cursor_position(self):
-        """Get the current cursor position"""
-        return self.cursor_pos
+        """Get the filtered cursor position predicted for the current time"""
+        with self.filter_lock:
+            pos = self.cursor_filter.sample(time.perf_counter())
+        if pos is None:
+            return self.snapshot.cursor_pos
+        return int(round(pos[0])), int(round(pos[1]))
         
     def is_cursor_down(self):
         """Check if the cursor is clicking"""
-        return self.is_clicking
+        return self.snapshot.is_clicking
         
+    def get_hands(self):
+        """Get a HandState per tracked hand, up to max_hands, positions predicted for the current time"""
+        if self.max_hands == 1:
+            return [HandState(0, self.get_cursor_position(), self.is_cursor_down())]
+        with self.filter_lock:
+            return self.tracks.hands(time.perf_counter())
+            
     def set_screen_dimensions(self, width, height):
         """Update screen dimensions for coordinate conversion"""
         self.screen_w = width
         self.screen_h = height
+        with self.filter_lock:
+            self.cursor_filter.reset()
+            self.tracks.reset()
         
     def cleanup(self):
         """Clean up resources"""
         self.running = False
+        self.latest.close()
+        if self.capture_thread.is_alive():
+            self.capture_thread.join(1.0)  # Wait for threads to finish
         if self.thread.is_alive():
-            self.thread.join(1.0)  # Wait for thread to finish
-        self.cap.release()
+            self.thread.join(1.0)
+        if self.preview and self.preview_thread.is_alive():
+            self.preview_thread.join(1.0)
+        self.source.release()
+        if self.recorder:
+            self.recorder.close()
         cv2.destroyAllWindows()
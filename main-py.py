@@ -1,35 +1,167 @@
 import os
 import sys
+import atexit
 import argparse
 
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.game import FruitNinjaGame
-from src.hand_tracker import HandTracker
+from src.startup import startup
+
+# The camera and vision modules (cv2, cvzone, MediaPipe) are only imported
+# once tracking is requested, everything else is timed for the startup report
+with startup.timed('import', 'src.game'):
+    from src.game import FruitNinjaGame
+with startup.timed('import', 'src.filters'):
+    from src.filters import FILTERS, make_filter
+with startup.timed('import', 'src.script'):
+    from src.script import make_script
+with startup.timed('import', 'src.profiler'):
+    from src.profiler import profiler
 
 def main():
     parser = argparse.ArgumentParser(description='Fruit Ninja Game by MediaPie')
     parser.add_argument('--use-camera', action='store_true', help='Use camera for hand tracking')
     parser.add_argument('--fullscreen', action='store_true', help='Run in fullscreen mode')
+    parser.add_argument('--source', default=None,
+                        help="Tracker input: 'camera[:index]', a video file, an image glob or 'landmarks:FILE' "
+                             "(implies --use-camera)")
+    parser.add_argument('--replay-offline', action='store_true',
+                        help='Feed every frame or landmark sample of a file source in order as fast as it is taken, '
+                             'instead of at its recorded rate')
+    parser.add_argument('--record-landmarks', metavar='FILE', help='Save detected landmarks for later replay')
+    parser.add_argument('--players', type=int, choices=range(1, 5), default=1,
+                        help='Players slicing at once, each with their own tracked hand, score and combo')
+    parser.add_argument('--tracker-process', action='store_true',
+                        help='Run hand detection in a separate process fed through shared memory')
+    parser.add_argument('--tracker-preview', action='store_true',
+                        help='Show the hand tracker debug window (the tracker is headless otherwise)')
+    parser.add_argument('--detect-interval', type=int, default=1,
+                        help='Run the full hand detector every N frames and track with optical flow in between')
+    parser.add_argument('--detect-scale', type=float, default=1.0,
+                        help='Downscale factor for the hand detector input')
+    parser.add_argument('--cursor-filter', choices=sorted(FILTERS), default='none',
+                        help='Smoothing/prediction applied to the hand cursor')
+    parser.add_argument('--rotation-steps', type=int, default=0,
+                        help='Use pre-rotated sprites with this many angle steps (0 to rotate every frame)')
+    parser.add_argument('--rotate-trails', action='store_true',
+                        help='Rotate the trail ghosts with the fruit, needs --rotation-steps')
+    parser.add_argument('--prerotate', action='store_true', help='Render all sprite rotations at startup')
+    parser.add_argument('--fps', type=int, default=60,
+                        help='Render frame rate cap (0 for uncapped), the simulation always runs at 60 steps/s')
+    parser.add_argument('--window-size', metavar='WxH',
+                        help='Window size, the game is drawn at 800x600 and scaled to fit')
+    parser.add_argument('--dynamic-resolution', action='store_true',
+                        help='Lower the display scaling quality when frames go over budget, raise it with headroom')
+    parser.add_argument('--adaptive-quality', action='store_true',
+                        help='Lower trails, effects and rotation quality when frames go over budget, restore them with headroom')
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='Redraw and update only the screen areas that changed (falls back to full frames when busy)')
+    parser.add_argument('--physics', choices=['objects', 'numpy'], default='objects',
+                        help='Fruit physics backend (numpy steps all fruits in one vectorized call)')
+    parser.add_argument('--headless', action='store_true',
+                        help='Simulate without a window as fast as possible and print the stats')
+    parser.add_argument('--seed', type=int, default=None, help='Seed the game RNG for reproducible rounds')
+    parser.add_argument('--script', default=None,
+                        help="Scripted input: 'sweep' or a JSON file of [step, x, y, down] keyframes")
+    parser.add_argument('--rounds', type=int, default=1, help='Rounds to play in headless mode')
+    parser.add_argument('--no-render', action='store_true', help='Skip drawing in headless mode')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time the frame phases and tracker stages and show the overlay (F3 toggles it)')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Save the profiler timings as Chrome trace-event JSON on exit (implies --profile)')
+    parser.add_argument('--startup-report', action='store_true',
+                        help='Print import, asset decode and time-to-first-frame timings')
+    parser.add_argument('--batch-envs', type=int, default=0,
+                        help='Play this many seeded rounds through the batched simulation instead of a window')
+    parser.add_argument('--workers', type=int, default=1, help='Processes to shard the batched rounds over')
     
     args = parser.parse_args()
+    if args.tracker_process and args.players > 1:
+        parser.error('--tracker-process detects a single hand, leave it out for more than one player')
+    startup.enabled = args.startup_report
     
+    # Profile from the start so the tracker stages are timed too
+    if args.profile or args.trace:
+        profiler.enable()
+    if args.trace:
+        atexit.register(profiler.export_trace, args.trace)
+        
+    # Batched rounds need neither a window nor a tracker
+    if args.batch_envs:
+        import time
+        import functools
+        from src.batch import run_sharded
+        first_seed = args.seed or 0
+        seeds = range(first_seed, first_seed + args.batch_envs)
+        # Each round gets the script a headless run with its seed would get
+        script_factory = functools.partial(make_script, args.script) if args.script else None
+        start = time.perf_counter()
+        results = run_sharded(seeds, script_factory, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        steps = sum(result['steps'] for result in results)
+        scores = [result['score'] for result in results]
+        print(f"{len(results)} rounds, mean score {sum(scores) / len(scores):.2f}, best {max(scores)}")
+        print(f"{steps} steps in {elapsed:.2f}s ({steps / elapsed:.0f} steps/s over {args.workers} workers)")
+        return
+        
     # Initialize hand tracker if requested
     hand_tracker = None
-    if args.use_camera:
+    if (args.use_camera or args.source) and not args.headless:
         try:
-            hand_tracker = HandTracker()
+            with startup.timed('import', 'src.sources'):
+                from src.sources import open_source
+            source = open_source(args.source or 'camera', realtime=not args.replay_offline)
+            if args.tracker_process:
+                with startup.timed('import', 'src.hand_process'):
+                    from src.hand_process import ProcessHandTracker
+                hand_tracker = ProcessHandTracker(cursor_filter=make_filter(args.cursor_filter), source=source)
+            else:
+                with startup.timed('import', 'src.hand_tracker'):
+                    from src.hand_tracker import HandTracker
+                hand_tracker = HandTracker(
+                    preview=args.tracker_preview,
+                    detect_interval=args.detect_interval,
+                    detect_scale=args.detect_scale,
+                    cursor_filter=make_filter(args.cursor_filter),
+                    source=source,
+                    record_path=args.record_landmarks,
+                    max_hands=args.players
+                )
             print("Hand tracking enabled!")
         except Exception as e:
             print(f"Could not initialize hand tracking: {e}")
             print("Falling back to mouse control")
     
     # Start the game
-    game = FruitNinjaGame(
-        fullscreen=args.fullscreen,
-        hand_tracker=hand_tracker
-    )
+    with startup.timed('init', 'FruitNinjaGame'):
+        game = FruitNinjaGame(
+            fullscreen=args.fullscreen,
+            hand_tracker=hand_tracker,
+            rotation_steps=args.rotation_steps,
+            prerotate=args.prerotate,
+            physics=args.physics,
+            dirty_rects=args.dirty_rects,
+            display_size=tuple(int(n) for n in args.window_size.lower().split('x')) if args.window_size else None,
+            dynamic_resolution=args.dynamic_resolution,
+            adaptive_quality=args.adaptive_quality,
+            players=args.players,
+            fps=args.fps,
+            seed=args.seed,
+            headless=args.headless,
+            script=make_script(args.script, args.seed or 0) if args.script else None
+        )
+    game.settings['show_profiler'] = args.profile
+    game.settings['rotate_trails'] = args.rotate_trails
+    
+    if args.headless:
+        # Without a script nobody is slicing, which still measures spawning and physics
+        stats = game.run_headless(rounds=args.rounds, render=not args.no_render)
+        print(f"Seed {stats['seed']}: {stats['rounds']} rounds, scores {stats['scores']}")
+        print(f"{stats['steps']} steps in {stats['seconds']:.2f}s "
+              f"({stats['steps_per_second']:.0f} steps/s, {stats['speedup']:.1f}x real time, "
+              f"{stats['draw_seconds']:.2f}s drawing)")
+        return
     game.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+import numpy as np
+
+from src.assets import assets
+from src.fruit import (BaseFruitManager, TRAIL_LENGTH, COLLISION_RADIUS, launch_state, slice_speed,
+                       draw_trail, draw_rotated)
+
+def move_fruits(x, y, speed_x, speed_y, time, moving=None):
+    """Step the fruit physics of the given arrays in place, only where moving is set if given"""
+    if moving is None:
+        x += speed_x
+        y += speed_y
+        speed_y += time
+        time += 1
+    else:
+        np.add(x, speed_x, out=x, where=moving)
+        np.add(y, speed_y, out=y, where=moving)
+        np.add(speed_y, time, out=speed_y, where=moving)
+        np.add(time, 1, out=time, where=moving)
+        
+def blade_touches(x, y, ax, ay, bx, by):
+    """Check which fruits are within reach of the blade segments from a to b, broadcasting like NumPy"""
+    seg_x = bx - ax
+    seg_y = by - ay
+    length_sq = seg_x * seg_x + seg_y * seg_y
+    t = ((x - ax) * seg_x + (y - ay) * seg_y) / np.where(length_sq, length_sq, 1.0)
+    np.clip(t, 0.0, 1.0, out=t)
+    dx = x - (ax + t * seg_x)
+    dy = y - (ay + t * seg_y)
+    return dx * dx + dy * dy < COLLISION_RADIUS * COLLISION_RADIUS
+
+class ArrayFruitManager(BaseFruitManager):
+    """FruitManager that keeps all fruit state in NumPy arrays and steps it in one go
+    
+    Spawning, physics, slicing and random draws happen in the same order as
+    the per-object FruitManager, so both produce identical games for a seed.
+    """
+    
+    def __init__(self, game, capacity=256):
+        super().__init__(game)
+        self.kinds = self.fruit_types + ['bomb']
+        self.bomb_kind = len(self.kinds) - 1
+        self.count = 0
+        self._allocate(capacity)
+        
+        # Sprites per kind, looked up once
+        self.images = [assets.image('images', 'fruits', f'{name}.png') for name in self.kinds]
+        self.half_images = [assets.image('images', 'fruits', f'half_{name}.png') for name in self.fruit_types]
+        self.half_images.append(assets.image('images', 'fruits', 'explosion.png'))
+        
+    def _allocate(self, capacity):
+        """Create the state arrays, keeping the entities that already exist"""
+        old = getattr(self, 'x', None)
+        n = self.count
+        arrays = {
+            'x': np.zeros(capacity),
+            'y': np.zeros(capacity),
+            'speed_x': np.zeros(capacity),
+            'speed_y': np.zeros(capacity),
+            'time': np.zeros(capacity),
+            'rotation': np.zeros(capacity),
+            'rotation_speed': np.zeros(capacity),
+            'prev_x': np.zeros(capacity),
+            'prev_y': np.zeros(capacity),
+            'prev_rotation': np.zeros(capacity),
+            'hit': np.zeros(capacity, dtype=bool),
+            'kind': np.zeros(capacity, dtype=np.int16),
+            'positions': np.zeros((capacity, TRAIL_LENGTH, 2)),
+            'trail_start': np.zeros(capacity, dtype=np.int16),
+            'trail_count': np.zeros(capacity, dtype=np.int16)
+        }
+        for name, array in arrays.items():
+            if old is not None:
+                array[:n] = getattr(self, name)[:n]
+            setattr(self, name, array)
+        self.capacity = capacity
+        
+    def update(self):
+        """Update all fruits and spawn new ones"""
+        # Update spawn timer
+        self.spawn_timer -= 1
+        
+        # Spawn new fruits if timer expired
+        if self.spawn_timer <= 0:
+            self._spawn_fruits()
+        
+        self._update_combos()
+        
+        n = self.count
+        if not n:
+            return
+            
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        self.prev_rotation[:n] = self.rotation[:n]
+        
+        # Physics
+        move_fruits(self.x[:n], self.y[:n], self.speed_x[:n], self.speed_y[:n], self.time[:n])
+        
+        # Rotation
+        self.rotation[:n] += self.rotation_speed[:n]
+        
+        # Store positions for trail effect (store only every 3 frames)
+        if self.game.frame_count % 3 == 0:
+            rows = np.arange(n)
+            start = self.trail_start[:n]
+            count = self.trail_count[:n]
+            index = (start + count) % TRAIL_LENGTH
+            self.positions[rows, index, 0] = self.x[:n]
+            self.positions[rows, index, 1] = self.y[:n]
+            full = count == TRAIL_LENGTH
+            start[full] = (start[full] + 1) % TRAIL_LENGTH
+            count[~full] += 1
+        
+        # Cull fruits that have gone off-screen, keeping the draw order
+        alive = self.y[:n] <= self.game.height + 100
+        if not alive.all():
+            kept = int(alive.sum())
+            for name in ('x', 'y', 'speed_x', 'speed_y', 'time', 'rotation', 'rotation_speed',
+                         'prev_x', 'prev_y', 'prev_rotation',
+                         'hit', 'kind', 'positions', 'trail_start', 'trail_count'):
+                array = getattr(self, name)
+                array[:kept] = array[:n][alive]
+            self.count = kept
+            
+    def draw(self, surface, alpha=1.0, dirty=None):
+        """Draw all fruits interpolated between the last two simulation steps"""
+        n = self.count
+        xs = self.prev_x[:n] + (self.x[:n] - self.prev_x[:n]) * alpha
+        ys = self.prev_y[:n] + (self.y[:n] - self.prev_y[:n]) * alpha
+        rotations = self.prev_rotation[:n] + (self.rotation[:n] - self.prev_rotation[:n]) * alpha
+        
+        show_trails = self.game.settings['show_trails']
+        for i in range(n):
+            kind = self.kind[i]
+            hit = self.hit[i]
+            if show_trails and not hit:
+                draw_trail(surface, self.game, self.images[kind], rotations[i],
+                           self.positions[i], self.trail_start[i], self.trail_count[i], dirty)
+            img = self.half_images[kind] if hit else self.images[kind]
+            draw_rotated(surface, self.game, img, xs[i], ys[i], rotations[i], dirty)
+        
+        self._draw_combo(surface, dirty)
+        
+    def check_blades(self, blades):
+        """Check the (player, pos, prev_pos) blades against all fruits, getting [hit_fruit, hit_bomb] per player"""
+        hits = {player: [False, False] for player, _, _ in blades}
+        n = self.count
+        if not n:
+            return hits
+            
+        # Squared distance of every fruit to every blade segment in one
+        # (blades, fruits) pass, which is already cheaper than a grid in Python
+        segments = np.array([
+            tuple(pos if prev_pos is None else prev_pos) + tuple(pos) for _, pos, prev_pos in blades
+        ], dtype=float)
+        touched = blade_touches(self.x[:n], self.y[:n], segments[:, 0:1], segments[:, 1:2],
+                                segments[:, 2:3], segments[:, 3:4]) & ~self.hit[:n]
+        first_blade = touched.argmax(axis=0)  # The first blade that touches a fruit slices it
+        
+        # Slice in list order so the combo and random draws match the object path
+        for i in np.flatnonzero(touched.any(axis=0)):
+            self.hit[i] = True
+            self.speed_x[i], self.speed_y[i] = slice_speed(self.game.rng, self.speed_x[i], self.speed_y[i])
+            
+            player, pos, _ = blades[first_blade[i]]
+            is_bomb = bool(self.kind[i] == self.bomb_kind)
+            self._on_slice(is_bomb, self.x[i], self.y[i], pos, player)
+            hits[player][is_bomb] = True
+        
+        return hits
+        
+    def clear(self):
+        """Remove every fruit and reset the timers"""
+        self.count = 0
+        self.spawn_timer = 0
+        self.combo_counters = [0] * self.game.players
+        self.combo_timers = [0] * self.game.players
+        
+    def _spawn(self, name):
+        """Add a new fruit or bomb of the given type"""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        
+        i = self.count
+        (self.x[i], self.y[i], self.speed_x[i], self.speed_y[i],
+         self.rotation[i], self.rotation_speed[i]) = launch_state(self.game)
+        self.prev_x[i] = self.x[i]
+        self.prev_y[i] = self.y[i]
+        self.prev_rotation[i] = self.rotation[i]
+        self.time[i] = 0
+        self.hit[i] = False
+        self.kind[i] = self.kinds.index(name)
+        self.trail_start[i] = 0
+        self.trail_count[i] = 0
+        self.count += 1
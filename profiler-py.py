@@ -0,0 +1,158 @@
+import pygame
+import json
+import time
+import threading
+from collections import deque
+
+from src.text import text_cache
+
+class _NullScope:
+    """Scope handed out while profiling is off, does nothing"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        return False
+
+NULL_SCOPE = _NullScope()
+
+class _Scope:
+    """Times the block it wraps and reports it to the profiler"""
+    
+    __slots__ = ('profiler', 'name', 'start')
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+        
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+class Profiler:
+    """Scoped timers for the frame phases and tracker stages, off unless enabled"""
+    
+    def __init__(self, history=300, max_events=200000):
+        self.enabled = False
+        self.history = history  # Samples kept per timer for the percentiles
+        self.samples = {}
+        self.frame_times = deque(maxlen=history)
+        self.frame_start = None
+        
+        # Every timed block for the trace export, oldest dropped first
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        
+        # Overlay, its text only changes a few times a second
+        self.panel = None
+        self.lines = []
+        self.next_lines = 0
+        
+    def enable(self, enabled=True):
+        """Turn the timers on or off"""
+        self.enabled = enabled
+        self.frame_start = None
+        
+    def scope(self, name):
+        """Get a context manager timing the block it wraps"""
+        if not self.enabled:
+            return NULL_SCOPE
+        return _Scope(self, name)
+        
+    def record(self, name, start, end):
+        """Add a block that ran from start to end (perf_counter seconds) on this thread"""
+        if not self.enabled:
+            return
+        thread_id = threading.get_ident()
+        if thread_id not in self.thread_names:
+            self.thread_names[thread_id] = threading.current_thread().name
+        self.events.append((name, thread_id, start, end - start))
+        
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.history)
+        samples.append(end - start)
+        
+    def frame(self):
+        """Mark the start of a rendered frame, the time since the last mark is a frame time"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frame_times.append(now - self.frame_start)
+            self.events.append(('frame', threading.get_ident(), self.frame_start, now - self.frame_start))
+        self.frame_start = now
+        
+    def _percentiles(self, samples, percentiles=(50, 90, 99)):
+        """Get percentiles of a list of seconds in milliseconds"""
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return [ordered[round(last * p / 100)] * 1000 for p in percentiles]
+        
+    def summary(self):
+        """Get the p50/p90/p99 milliseconds and sample count of every timer and the frame time"""
+        timers = dict(self.samples, frame=self.frame_times)
+        return {
+            name: dict(zip(('p50', 'p90', 'p99'), self._percentiles(samples)), samples=len(samples))
+            for name, samples in timers.items() if samples
+        }
+        
+    def export_trace(self, path):
+        """Save the recorded blocks as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': thread_id, 'args': {'name': name}}
+            for thread_id, name in self.thread_names.items()
+        ]
+        events.extend(
+            {'name': name, 'ph': 'X', 'pid': 1, 'tid': thread_id, 'ts': start * 1e6, 'dur': duration * 1e6}
+            for name, thread_id, start, duration in list(self.events)
+        )
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        print(f"Saved {len(events)} trace events to {path}")
+        
+    def draw_overlay(self, surface, width=300, graph_height=60, budget=1 / 60):
+        """Draw the frame time graph and the timer percentiles in the bottom left corner, returning its rect"""
+        now = time.perf_counter()
+        if now >= self.next_lines:
+            self.lines = [f'{name} {p50:.2f} / {p99:.2f} ms' for name, (p50, p99) in sorted(
+                (name, self._percentiles(samples, (50, 99))) for name, samples in list(self.samples.items()) if samples)]
+            if self.frame_times:
+                p50, p99 = self._percentiles(self.frame_times, (50, 99))
+                self.lines.insert(0, f'frame {p50:.1f} / {p99:.1f} ms ({1000 / p50:.0f} fps)')
+            self.next_lines = now + 0.25
+        
+        height = graph_height + 16 * len(self.lines) + 8
+        if self.panel is None or self.panel.get_size() != (width, height):
+            self.panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.panel.fill((0, 0, 0, 160))
+        
+        # One bar per frame, 2 frame budgets tall, coloured by how far over budget
+        scale = graph_height / (2 * budget)
+        frames = list(self.frame_times)[-width:]
+        for x, frame_time in enumerate(frames):
+            bar = min(graph_height, int(frame_time * scale))
+            color = (80, 220, 80) if frame_time <= budget else (230, 200, 60) if frame_time <= 2 * budget else (230, 60, 60)
+            pygame.draw.line(self.panel, color, (x, graph_height), (x, graph_height - bar))
+        pygame.draw.line(self.panel, (255, 255, 255), (0, graph_height // 2), (width, graph_height // 2))
+        
+        for i, line in enumerate(self.lines):
+            self.panel.blit(text_cache.render(line, 14), (4, graph_height + 4 + i * 16))
+        return surface.blit(self.panel, (0, surface.get_height() - height))
+        
+    def clear(self):
+        """Forget all samples and events"""
+        self.samples = {}
+        self.frame_times.clear()
+        self.events.clear()
+        self.frame_start = None
+
+# Global profiler
+profiler = Profiler()
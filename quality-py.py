@@ -0,0 +1,115 @@
+import time
+from collections import deque
+
+# Quality steps from first to give up to last, each (name, setting, value).
+# Steps that would not change the current setting are skipped.
+STEPS = [
+    ('trail rotation', 'rotate_trails', False),
+    ('trail length', 'trail_length', 3),
+    ('trail length', 'trail_length', 1),
+    ('trails', 'show_trails', False),
+    ('effect detail', 'effect_detail', 'low'),
+    ('rotation precision', 'rotation_steps', 16),
+    ('max effects', 'max_effects', 32),
+    ('max effects', 'max_effects', 12)
+]
+
+class QualityManager:
+    """Lowers the game settings step by step while frames go over budget
+    
+    Frame work times go into a rolling window. Once it is full, a percentile
+    over budget applies the next step of STEPS. The settings come back in
+    reverse order only after recover_windows full windows in a row stayed
+    under headroom times the budget, so the game does not flip back and forth
+    at the edge. The window starts over after every change.
+    """
+    
+    def __init__(self, settings, budget=1 / 60, window=60, percentile=95, headroom=0.7, recover_windows=3):
+        self.settings = settings
+        self.budget = budget
+        self.frame_times = deque(maxlen=window)
+        self.percentile = percentile
+        self.headroom = headroom
+        self.recover_windows = recover_windows
+        self.calm_windows = 0  # Full windows in a row under headroom
+        
+        # Steps taken so far with the value each one replaced, to restore it
+        self.applied = []
+        self.log = []  # (seconds since start, 'down' or 'up', name, setting, old, new, frame time)
+        self.start = time.perf_counter()
+        
+    def level(self):
+        """Get the number of steps taken down"""
+        return len(self.applied)
+        
+    def _frame_time(self):
+        """Get the percentile of the window in seconds"""
+        ordered = sorted(self.frame_times)
+        return ordered[min(len(ordered) - 1, len(ordered) * self.percentile // 100)]
+        
+    def update(self, frame_time):
+        """Add the work time of a frame and change the quality by one step when needed"""
+        self.frame_times.append(frame_time)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+            
+        measured = self._frame_time()
+        if measured > self.budget:
+            self.calm_windows = 0
+            self.step_down(measured)
+        elif measured < self.budget * self.headroom and self.applied:
+            self.calm_windows += 1
+            if self.calm_windows >= self.recover_windows:
+                self.calm_windows = 0
+                self.step_up(measured)
+            else:
+                self.frame_times.clear()
+        else:
+            self.calm_windows = 0
+            self.frame_times.clear()
+            
+    def step_down(self, measured=0.0):
+        """Apply the next step that changes a setting"""
+        for index in range(self.applied[-1][0] + 1 if self.applied else 0, len(STEPS)):
+            name, setting, value = STEPS[index]
+            if self._lower(setting, value):
+                old = self.settings[setting]
+                self.settings[setting] = value
+                self.applied.append((index, old))
+                self._changed('down', name, setting, old, value, measured)
+                return True
+        self.frame_times.clear()
+        return False
+        
+    def step_up(self, measured=0.0):
+        """Undo the last step taken"""
+        if not self.applied:
+            return False
+        index, old = self.applied.pop()
+        name, setting, value = STEPS[index]
+        self.settings[setting] = old
+        self._changed('up', name, setting, value, old, measured)
+        return True
+        
+    def _lower(self, setting, value):
+        """Check whether a step value is lower quality than the current setting"""
+        current = self.settings[setting]
+        if setting in ('trail_length', 'max_effects'):
+            return current is None or value < current
+        if setting == 'rotation_steps':
+            # 0 rotates exactly, any step count is coarser
+            return current == 0 or value < current
+        return current != value
+        
+    def _changed(self, direction, name, setting, old, new, measured):
+        """Log a change and start a fresh window to judge it"""
+        self.frame_times.clear()
+        self.log.append((time.perf_counter() - self.start, direction, name, setting, old, new, measured))
+        print(f"Quality {direction}: {name} ({setting} {old} -> {new}), "
+              f"p{self.percentile} {measured * 1000:.1f} ms for a {self.budget * 1000:.1f} ms budget")
+              
+    def report(self):
+        """Print every change made this session"""
+        print(f"Quality governor made {len(self.log)} changes, {self.level()} steps down now")
+        for seconds, direction, name, setting, old, new, measured in self.log:
+            print(f"  {seconds:8.1f}s {direction:>4} {name}: {setting} {old} -> {new} ({measured * 1000:.1f} ms)")
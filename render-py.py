@@ -0,0 +1,82 @@
+import pygame
+
+class DirtyRenderer:
+    """Restores and presents only the screen areas drawn this frame or the last one
+    
+    Drawables add the rects they touched to a list. Next frame those areas
+    are restored from the background, and only the old and new rects are
+    sent to the display. When the damaged area passes threshold (a fraction
+    of the screen), a full background blit and flip is cheaper and used instead.
+    """
+    
+    def __init__(self, screen, threshold=0.5):
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.threshold = threshold
+        self.background = None
+        self.previous = []  # Rects drawn last frame
+        self.current = []  # Rects drawn this frame
+        self.invalid = True  # Screen contents unknown, restore everything
+        self.flip_all = True  # Present the whole display this frame
+        
+        # Statistics
+        self.frames = 0
+        self.full_frames = 0
+        self.dirty_area = 0.0  # Average fraction of the screen presented
+        
+    def invalidate(self):
+        """Redraw and present the whole screen next frame, after menus or overlays"""
+        self.invalid = True
+        
+    def _area(self, rects):
+        """Get the area covered by rects, counting overlaps twice"""
+        clip = self.screen_rect.clip
+        area = 0
+        for rect in rects:
+            clipped = clip(rect)
+            area += clipped.width * clipped.height
+        return area
+        
+    def restore(self, background):
+        """Erase what was drawn last frame by copying the background over it"""
+        if background is not self.background:
+            self.background = background
+            self.invalid = True
+        
+        if self.invalid or self._area(self.previous) > self.threshold * self.screen_rect.width * self.screen_rect.height:
+            self.screen.blit(background, (0, 0))
+            self.invalid = False
+            self.flip_all = True
+        else:
+            for rect in self.previous:
+                self.screen.blit(background, rect, rect)
+                
+    def mark(self, rects):
+        """Add rects drawn this frame"""
+        self.current.extend(rects)
+        
+    def present(self):
+        """Send this frame to the display, only the damaged areas when possible"""
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        if self.invalid or self.flip_all:
+            pygame.display.flip()
+            self.full_frames += 1
+            area = 1.0
+        else:
+            rects = self.previous + self.current
+            pygame.display.update(rects)
+            area = min(1.0, self._area(rects) / screen_area)
+        self.frames += 1
+        self.dirty_area += (area - self.dirty_area) * 0.05
+        
+        self.previous = self.current
+        self.current = []
+        self.flip_all = False
+        
+    def stats(self):
+        """Get how many frames were presented in full"""
+        return {
+            'frames': self.frames,
+            'full_frames': self.full_frames,
+            'dirty_area': self.dirty_area
+        }
@@ -0,0 +1,50 @@
+import json
+import math
+import random
+from bisect import bisect_right
+
+class ScriptedInput:
+    """Cursor played back from keyframes indexed by simulation step, so runs replay exactly"""
+    
+    def __init__(self, keyframes):
+        # Each keyframe is (step, x, y, down) and holds until the next one
+        self.keyframes = sorted((int(step), (int(x), int(y)), bool(down)) for step, x, y, down in keyframes)
+        self.steps = [keyframe[0] for keyframe in self.keyframes]
+        
+    @classmethod
+    def load(cls, path):
+        """Read keyframes from a JSON list of [step, x, y, down]"""
+        with open(path) as f:
+            return cls(json.load(f))
+            
+    def cursor(self, step, width, height):
+        """Get the cursor position and whether it is pressed at a simulation step"""
+        i = bisect_right(self.steps, step) - 1
+        if i < 0:
+            return (width // 2, height // 2), False
+        _, pos, down = self.keyframes[i]
+        return pos, down
+
+class SweepInput:
+    """Blade swinging back and forth across the screen, with its timing rolled from a seed"""
+    
+    def __init__(self, seed=0, period=90, rest=20):
+        rng = random.Random(seed)
+        self.phase = rng.random() * 2 * math.pi
+        self.period = period  # Steps per swing and back
+        self.rest = rest  # Steps the blade is lifted between swings
+        
+    def cursor(self, step, width, height):
+        """Get the cursor position and whether it is pressed at a simulation step"""
+        cycle = self.period + self.rest
+        t = (step % cycle) / self.period
+        angle = 2 * math.pi * t + self.phase
+        x = width / 2 + width * 0.4 * math.sin(angle)
+        y = height / 2 + height * 0.3 * math.sin(2 * angle)
+        return (int(x), int(y)), t < 1.0
+
+def make_script(spec, seed=0):
+    """Create a scripted input from 'sweep' or the path of a keyframe file"""
+    if spec == 'sweep':
+        return SweepInput(seed)
+    return ScriptedInput.load(spec)
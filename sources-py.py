@@ -0,0 +1,178 @@
+import cv2
+import numpy as np
+import glob
+import time
+
+# One recorded detection: timestamp, whether a hand was found, raised
+# fingers as a bitmask (thumb first) and the 21 landmarks in camera pixels
+LANDMARK_RECORD = np.dtype([
+    ('t', '<f8'),
+    ('found', 'u1'),
+    ('fingers', 'u1'),
+    ('lm', '<i2', (21, 3))
+])
+
+class CameraSource:
+    """Live webcam frames"""
+    
+    landmarks = False  # Sources of landmarks skip the detector
+    realtime = True  # Realtime sources may drop frames when inference is slow
+    
+    def __init__(self, index=0, width=640, height=480):
+        self.cap = cv2.VideoCapture(index)
+        self.cap.set(3, width)
+        self.cap.set(4, height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Don't queue stale frames in the driver
+        self.size = (width, height)
+        self.finished = False
+        
+    def read(self):
+        """Get (success, frame)"""
+        return self.cap.read()
+        
+    def release(self):
+        """Release the camera"""
+        self.cap.release()
+
+class VideoFileSource(CameraSource):
+    """Frames from a video file, paced at the file's frame rate if realtime"""
+    
+    def __init__(self, path, realtime=True, loop=False):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video {path}")
+        self.size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.realtime = realtime
+        self.loop = loop
+        self.interval = 1.0 / (self.cap.get(cv2.CAP_PROP_FPS) or 30)
+        self.next_frame = time.perf_counter()
+        self.finished = False
+        
+    def read(self):
+        """Get (success, frame), setting finished at the end of the file"""
+        if self.realtime:
+            delay = self.next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame = max(self.next_frame, time.perf_counter() - self.interval) + self.interval
+        
+        success, img = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, img = self.cap.read()
+        if not success:
+            self.finished = True
+        return success, img
+
+class ImageSequenceSource(CameraSource):
+    """Frames from image files matching a glob pattern, in sorted order"""
+    
+    def __init__(self, pattern, realtime=True, fps=30):
+        self.paths = sorted(glob.glob(pattern))
+        if not self.paths:
+            raise IOError(f"No images match {pattern}")
+        first = cv2.imread(self.paths[0])
+        self.size = (first.shape[1], first.shape[0])
+        self.realtime = realtime
+        self.interval = 1.0 / fps
+        self.next_frame = time.perf_counter()
+        self.index = 0
+        self.finished = False
+        
+    def read(self):
+        """Get (success, frame), setting finished after the last image"""
+        if self.index >= len(self.paths):
+            self.finished = True
+            return False, None
+        if self.realtime:
+            delay = self.next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame = max(self.next_frame, time.perf_counter() - self.interval) + self.interval
+        
+        img = cv2.imread(self.paths[self.index])
+        self.index += 1
+        return img is not None, img
+        
+    def release(self):
+        """Nothing to release"""
+
+class LandmarkReplaySource:
+    """Recorded landmarks replayed in place of camera frames and detection"""
+    
+    landmarks = True
+    
+    def __init__(self, path, realtime=True, size=(640, 480)):
+        self.records = np.fromfile(path, dtype=LANDMARK_RECORD)
+        self.size = size
+        self.realtime = realtime
+        self.index = 0
+        self.start = None
+        self.capture_time = 0.0  # Capture time of the last sample on the perf_counter clock
+        self.finished = False
+        
+    def read(self):
+        """Get (success, hands) where hands is a list like HandDetector.findHands returns"""
+        if self.index >= len(self.records):
+            self.finished = True
+            return False, None
+        record = self.records[self.index]
+        self.index += 1
+        
+        # Paced samples keep their recorded spacing from the time the replay
+        # started, offline ones run ahead of that and take the read time
+        if self.realtime:
+            if self.start is None:
+                self.start = time.perf_counter() - float(record['t'])
+            self.capture_time = self.start + float(record['t'])
+            delay = self.capture_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            self.capture_time = time.perf_counter()
+        
+        if not record['found']:
+            return True, []
+        fingers = [(int(record['fingers']) >> i) & 1 for i in range(5)]
+        return True, [{'lmList': record['lm'].tolist(), 'fingers': fingers}]
+        
+    def release(self):
+        """Nothing to release"""
+
+class LandmarkRecorder:
+    """Appends detection results to a compact landmark file for later replay"""
+    
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.start = None
+        
+    def write(self, capture_time, hand, fingers):
+        """Record the hand found at capture_time, or a miss if hand is None"""
+        if self.start is None:
+            self.start = capture_time
+        record = np.zeros(1, dtype=LANDMARK_RECORD)
+        record['t'] = capture_time - self.start
+        if hand:
+            record['found'] = 1
+            record['fingers'] = sum(1 << i for i, up in enumerate(fingers[:5]) if up)
+            record['lm'][0] = [lm[:3] for lm in hand['lmList']]
+        self.file.write(record.tobytes())
+        
+    def close(self):
+        """Flush and close the file"""
+        self.file.close()
+
+def open_source(spec, realtime=True):
+    """Create a source from 'camera[:index]', 'landmarks:path', an image glob or a video path
+    
+    File sources are paced at their recorded rate like a camera, or with
+    realtime off feed every sample in order as fast as it is taken.
+    """
+    if spec == 'camera' or spec.startswith('camera:'):
+        index = int(spec.split(':', 1)[1]) if ':' in spec else 0
+        return CameraSource(index)
+    if spec.startswith('landmarks:'):
+        return LandmarkReplaySource(spec.split(':', 1)[1], realtime)
+    if any(char in spec for char in '*?['):
+        return ImageSequenceSource(spec, realtime)
+    return VideoFileSource(spec, realtime)
@@ -0,0 +1,49 @@
+import time
+from contextlib import contextmanager
+
+class StartupTimer:
+    """Collects how long each startup step took and the time to the first frame"""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.steps = []  # (kind, name, seconds)
+        self.first_frame_time = None
+        self.enabled = False  # Print the report when the first frame is shown
+        
+    @contextmanager
+    def timed(self, kind, name):
+        """Time the block it wraps as one startup step"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(kind, name, time.perf_counter() - start)
+            
+    def add(self, kind, name, seconds):
+        """Add a step measured elsewhere"""
+        self.steps.append((kind, name, seconds))
+        
+    def first_frame(self):
+        """Mark the first frame on screen, only the first call counts"""
+        if self.first_frame_time is not None:
+            return
+        self.first_frame_time = time.perf_counter() - self.start
+        if self.enabled:
+            self.report()
+            
+    def report(self):
+        """Print every step grouped by kind, slowest first"""
+        kinds = []
+        for kind, _, _ in self.steps:
+            if kind not in kinds:
+                kinds.append(kind)
+        for kind in kinds:
+            steps = sorted((step for step in self.steps if step[0] == kind), key=lambda step: -step[2])
+            print(f"{kind}: {sum(step[2] for step in steps) * 1000:.1f} ms")
+            for _, name, seconds in steps:
+                print(f"  {seconds * 1000:8.1f} ms  {name}")
+        if self.first_frame_time is not None:
+            print(f"First frame after {self.first_frame_time * 1000:.1f} ms")
+
+# Started when main imports it, before any heavy module
+startup = StartupTimer()
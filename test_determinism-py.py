@@ -0,0 +1,20 @@
+import pytest
+
+from src.game import FruitNinjaGame
+from src.script import SweepInput
+from src.batch import run_episodes
+
+SEEDS = [0, 1, 2, 3, 4, 5]
+
+def play_headless(seed, physics):
+    """Play one scripted round in a headless game and get it in the shape of a batch result"""
+    game = FruitNinjaGame(seed=seed, headless=True, script=SweepInput(seed), physics=physics)
+    stats = game.run_headless(render=False)
+    return {'seed': seed, 'score': stats['scores'][0], 'lives': game.lives, 'steps': stats['steps']}
+
+@pytest.mark.parametrize('physics', ['objects', 'numpy'])
+def test_backends_match_batch(physics):
+    """Both fruit backends and BatchEnv end every seed with the same score, lives and steps"""
+    expected = run_episodes(SEEDS, SweepInput)
+    assert any(result['score'] for result in expected)
+    assert [play_headless(seed, physics) for seed in SEEDS] == expected
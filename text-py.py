@@ -0,0 +1,101 @@
+import pygame
+import os
+from collections import OrderedDict
+
+from src.assets import assets
+
+FONT_PATH = os.path.join('assets', 'fonts', 'mario.otf')
+
+class TextRenderer:
+    """Caches fonts, rendered text surfaces and word-wrapped layouts"""
+    
+    def __init__(self, max_surfaces=256):
+        self.fonts = {}
+        self.surfaces = OrderedDict()  # Least recently used first
+        self.layouts = {}
+        self.max_surfaces = max_surfaces
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        
+    def font(self, size, path=FONT_PATH):
+        """Get the font for the given path and size, creating it once"""
+        key = (path, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(assets.file(path), size)
+            self.fonts[key] = font
+        return font
+        
+    def render(self, text, size, color=(255, 255, 255), shadow=None, path=FONT_PATH):
+        """Get a rendered text surface, optionally with a drop shadow of the given color"""
+        key = (text, size, color, shadow, path)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+            
+        self.misses += 1
+        font = self.font(size, path)
+        surface = font.render(text, True, color)
+        
+        # Bake the shadow into the same surface, offset by 2 pixels
+        if shadow is not None:
+            shadow_surface = font.render(text, True, shadow)
+            combined = pygame.Surface((surface.get_width() + 2, surface.get_height() + 2), pygame.SRCALPHA)
+            combined.blit(shadow_surface, (2, 2))
+            combined.blit(surface, (0, 0))
+            surface = combined
+            
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)
+        return surface
+        
+    def wrap(self, text, size, max_width, path=FONT_PATH):
+        """Split text into lines no wider than max_width"""
+        key = (text, size, max_width, path)
+        lines = self.layouts.get(key)
+        if lines is not None:
+            return lines
+            
+        font = self.font(size, path)
+        lines = []
+        words = text.split(' ')
+        current_line = words[0]
+        for word in words[1:]:
+            test_line = current_line + ' ' + word
+            # Check if the line is too long
+            if font.size(test_line)[0] > max_width:
+                lines.append(current_line)
+                current_line = word
+            else:
+                current_line = test_line
+        lines.append(current_line)
+        
+        lines = tuple(lines)
+        self.layouts[key] = lines
+        return lines
+        
+    def stats(self):
+        """Get cache statistics"""
+        return {
+            'fonts': len(self.fonts),
+            'surfaces': len(self.surfaces),
+            'layouts': len(self.layouts),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+        
+    def clear(self):
+        """Drop all cached fonts, surfaces and layouts"""
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.layouts = {}
+        self.hits = 0
+        self.misses = 0
+        
+# Shared text cache used by the whole game
+text_cache = TextRenderer()
@@ -0,0 +1,43 @@
+import time
+
+SIM_RATE = 60  # Simulation steps per second, all game timers count these
+
+class FixedTimestep:
+    """Accumulator that turns real elapsed time into fixed simulation steps"""
+    
+    def __init__(self, rate=SIM_RATE, max_steps=5, clock=time.perf_counter):
+        self.dt = 1.0 / rate
+        self.max_steps = max_steps  # Catch-up cap per rendered frame
+        self.clock = clock
+        self.reset()
+        
+    def reset(self):
+        """Start measuring from now with an empty accumulator"""
+        self.last = self.clock()
+        self.accumulator = 0.0
+        
+        # Statistics
+        self.steps = 0
+        self.dropped = 0.0  # Seconds skipped because of the catch-up cap
+        
+    def advance(self):
+        """Get how many simulation steps to run for the time since the last call"""
+        now = self.clock()
+        self.accumulator += now - self.last
+        self.last = now
+        
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            # Too far behind, slow the game down instead of spiralling
+            skipped = (steps - self.max_steps) * self.dt
+            self.dropped += skipped
+            self.accumulator -= skipped
+            steps = self.max_steps
+        self.accumulator -= steps * self.dt
+        self.steps += steps
+        return steps
+        
+    @property
+    def alpha(self):
+        """Get how far rendering is between the last two simulation states"""
+        return min(1.0, self.accumulator / self.dt)
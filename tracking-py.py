@@ -0,0 +1,123 @@
+import threading
+from collections import namedtuple
+
+# Everything the game reads about the hand, published as one object so the
+# position and click state always come from the same frame
+TrackerSnapshot = namedtuple('TrackerSnapshot', ['cursor_pos', 'is_clicking', 'capture_time', 'inference_time'])
+
+# One tracked hand as the game sees it, hand_id stays the same while the hand is in view
+# and missed counts the detections in a row the hand was not found in
+HandState = namedtuple('HandState', ['hand_id', 'cursor_pos', 'is_clicking', 'missed'], defaults=(0,))
+
+class LatestFrame:
+    """One-slot buffer where a new frame replaces the one not yet taken"""
+    
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frame = None
+        self.capture_time = 0
+        
+        self.closed = False
+        
+        # Statistics
+        self.written = 0
+        self.dropped = 0
+        
+    def put(self, frame, capture_time, wait=False):
+        """Store a frame, dropping the previous one if nobody took it unless wait is set"""
+        with self.condition:
+            # Offline sources wait for the consumer so no frame is lost
+            while wait and self.frame is not None and not self.closed:
+                self.condition.wait(0.1)
+            if self.frame is not None:
+                self.dropped += 1
+            self.frame = frame
+            self.capture_time = capture_time
+            self.written += 1
+            self.condition.notify()
+            
+    def take(self, timeout=0.1):
+        """Wait for the newest frame and its capture time
+        
+        Without a new frame before the timeout, or once closed, the frame is
+        None and the capture time is that of the last frame stored (0 if none).
+        """
+        with self.condition:
+            if self.frame is None:
+                self.condition.wait(timeout)
+            frame, capture_time = self.frame, self.capture_time
+            self.frame = None
+            self.condition.notify_all()
+            return frame, capture_time
+            
+    def close(self):
+        """Release a producer waiting in put()"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+class HandTracks:
+    """Gives detected hands stable IDs, each with its own cursor filter and click state
+    
+    Every detection is matched to the tracked hand whose filter predicts the
+    nearest position, closest pairs first, so fast swipes keep their ID.
+    Only detections left over once every track is paired start a new ID,
+    and a hand that goes unmatched for more than max_missed detections
+    is dropped.
+    """
+    
+    def __init__(self, make_filter, max_missed=5):
+        self.make_filter = make_filter
+        self.max_missed = max_missed
+        self.tracks = {}  # hand_id -> [position, clicking, missed detections, filter]
+        self.next_id = 0
+        
+    def update(self, hands, t):
+        """Match a detection of (position, clicking) hands in screen pixels taken at time t"""
+        # Where each track should be by now, its last position without a prediction
+        predicted = {}
+        for hand_id, track in self.tracks.items():
+            pos = track[3].sample(t)
+            predicted[hand_id] = track[0] if pos is None else pos
+        pairs = sorted(
+            ((pos[0] - predicted[hand_id][0]) ** 2 + (pos[1] - predicted[hand_id][1]) ** 2, hand_id, i)
+            for hand_id in self.tracks for i, (pos, _) in enumerate(hands)
+        )
+        matched = {}
+        for _, hand_id, i in pairs:
+            if hand_id not in matched and i not in matched.values():
+                matched[hand_id] = i
+                
+        # Hands seen again follow their track, the rest start new ones
+        for i, (pos, clicking) in enumerate(hands):
+            if i in matched.values():
+                continue
+            matched[self.next_id] = i
+            self.tracks[self.next_id] = [pos, clicking, 0, self.make_filter()]
+            self.next_id += 1
+        for hand_id in list(self.tracks):
+            track = self.tracks[hand_id]
+            if hand_id in matched:
+                pos, clicking = hands[matched[hand_id]]
+                track[0], track[1], track[2] = pos, clicking, 0
+                track[3].update(pos, t)
+            else:
+                track[2] += 1
+                if track[2] > self.max_missed:
+                    del self.tracks[hand_id]
+                    
+    def hands(self, t):
+        """Get the HandState of every tracked hand, positions predicted for time t"""
+        # Hands missed by a few detections keep their ID but are never pressed,
+        # so they cannot slice where the hand no longer is
+        states = []
+        for hand_id, (pos, clicking, missed, cursor_filter) in sorted(self.tracks.items()):
+            filtered = cursor_filter.sample(t)
+            if filtered is not None:
+                pos = int(round(filtered[0])), int(round(filtered[1]))
+            states.append(HandState(hand_id, pos, clicking and not missed, missed))
+        return states
+        
+    def reset(self):
+        """Forget all hands"""
+        self.tracks = {}
@@ -1,6 +1,12 @@
 import pygame
-import os
 import random
+from collections import deque
+
+from src.assets import assets, effect_frames
+from src.text import text_cache
+
+# Blade, score and combo color of each player
+PLAYER_COLORS = [(255, 220, 60), (90, 200, 255), (255, 110, 180), (140, 255, 120)]
 
 class UI:
     """Handles all UI elements like menus, buttons, and HUD"""
@@ -8,12 +14,12 @@ class UI:
     def __init__(self, game):
         self.game = game
         self.buttons = {}
-        self.professor_image = pygame.image.load(os.path.join('assets', 'images', 'characters', 'professor.png'))
+        self.professor_image = assets.image('images', 'characters', 'professor.png')
         self.professor_rect = self.professor_image.get_rect(topleft=(20, self.game.height // 2))
         
         # Load icons
-        self.life_icon = pygame.image.load(os.path.join('assets', 'images', 'lives', 'white_lives.png'))
-        self.lost_life_icon = pygame.image.load(os.path.join('assets', 'images', 'lives', 'red_lives.png'))
+        self.life_icon = assets.image('images', 'lives', 'white_lives.png')
+        self.lost_life_icon = assets.image('images', 'lives', 'red_lives.png')
         
         # Fruit facts from the original code
         self.fruit_facts = [
@@ -55,7 +61,7 @@ class UI:
         color = button['color']
         
         # Check if mouse is hovering over button
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.game.viewport.to_logical(pygame.mouse.get_pos())
         if rect.collidepoint(mouse_pos):
             color = button['hover_color']
             
@@ -64,8 +70,7 @@ class UI:
         pygame.draw.rect(surface, (0, 0, 0), rect, 2)  # Border
         
         # Draw text
-        font = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), button['font_size'])
-        text = font.render(button['text'], True, button['text_color'])
+        text = text_cache.render(button['text'], button['font_size'], button['text_color'])
         text_rect = text.get_rect(center=rect.center)
         surface.blit(text, text_rect)
         
@@ -76,31 +81,44 @@ class UI:
             
         return self.buttons[button_id]['rect'].collidepoint(pos)
         
-    def draw_lives(self, surface, lives):
+    def draw_lives(self, surface, lives, dirty=None):
         """Draw the player lives icons"""
         for i in range(3):
             img = self.life_icon if i < lives else self.lost_life_icon
             img_rect = img.get_rect(topleft=(self.game.width - 110 + i * 35, 10))
-            surface.blit(img, img_rect)
-            
-    def draw_score(self, surface, score):
+            rect = surface.blit(img, img_rect)
+            if dirty is not None:
+                dirty.append(rect)
+                
+    def draw_score(self, surface, score, dirty=None):
         """Draw the score on the screen"""
-        font = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 42)
-        score_text = font.render(f'Score: {score}', True, (255, 255, 255))
-        surface.blit(score_text, (10, 10))
-        
-    def draw_timer(self, surface, time_left):
+        score_text = text_cache.render(f'Score: {score}', 42)
+        rect = surface.blit(score_text, (10, 10))
+        if dirty is not None:
+            dirty.append(rect)
+            
+    def draw_player_scores(self, surface, scores, dirty=None):
+        """Draw the score of every player under the timer"""
+        for player, score in enumerate(scores):
+            score_text = text_cache.render(f'P{player + 1}: {score}', 24, PLAYER_COLORS[player])
+            rect = surface.blit(score_text, (10, 95 + player * 28))
+            if dirty is not None:
+                dirty.append(rect)
+                
+    def draw_timer(self, surface, time_left, dirty=None):
         """Draw the timer on the screen"""
-        font = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 27)
-        timer_text = font.render(f'Time: {time_left}', True, (255, 255, 255))
-        surface.blit(timer_text, (10, 60))
-        
-    def draw_difficulty(self, surface, difficulty):
+        timer_text = text_cache.render(f'Time: {time_left}', 27)
+        rect = surface.blit(timer_text, (10, 60))
+        if dirty is not None:
+            dirty.append(rect)
+            
+    def draw_difficulty(self, surface, difficulty, dirty=None):
         """Draw the current difficulty level"""
-        font = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 16)
-        difficulty_text = font.render(f'Difficulty: {difficulty.capitalize()}', True, (255, 255, 255))
+        difficulty_text = text_cache.render(f'Difficulty: {difficulty.capitalize()}', 16)
         text_rect = difficulty_text.get_rect(bottomright=(self.game.width - 10, self.game.height - 10))
-        surface.blit(difficulty_text, text_rect)
+        rect = surface.blit(difficulty_text, text_rect)
+        if dirty is not None:
+            dirty.append(rect)
         
     def draw_start_screen(self, surface):
         """Draw the start screen with theme selection"""
@@ -108,14 +126,12 @@ class UI:
         surface.blit(self.game.background, (0, 0))
         
         # Draw title
-        font_title = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 70)
-        title_text = font_title.render('FRUIT NINJA!', True, (255, 255, 255))
+        title_text = text_cache.render('FRUIT NINJA!', 70)
         title_rect = title_text.get_rect(center=(self.game.width // 2, self.game.height // 4))
         surface.blit(title_text, title_rect)
         
         # Draw subtitle
-        font_subtitle = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 35)
-        subtitle_text = font_subtitle.render('Select a Theme', True, (255, 255, 255))
+        subtitle_text = text_cache.render('Select a Theme', 35)
         subtitle_rect = subtitle_text.get_rect(center=(self.game.width // 2, self.game.height // 2 - 45))
         surface.blit(subtitle_text, subtitle_rect)
         
@@ -135,29 +151,33 @@ class UI:
         surface.blit(self.professor_image, self.professor_rect)
         
         # Draw instruction text
-        font_instruction = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 20)
-        instruction_text = font_instruction.render('Click the professor for fruit facts!', True, (255, 255, 255))
+        instruction_text = text_cache.render('Click the professor for fruit facts!', 20)
         instruction_rect = instruction_text.get_rect(
             center=(self.game.width // 2, self.game.height * 3 // 4 + 50))
         surface.blit(instruction_text, instruction_rect)
         
-    def draw_game_over_screen(self, surface, score):
-        """Draw the game over screen"""
+    def draw_game_over_screen(self, surface, score, scores=None):
+        """Draw the game over screen, with the score of each player when there are several"""
         # Fill with background
         surface.blit(self.game.background, (0, 0))
         
         # Draw title
-        font_title = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 70)
-        title_text = font_title.render('GAME OVER!', True, (255, 255, 255))
+        title_text = text_cache.render('GAME OVER!', 70)
         title_rect = title_text.get_rect(center=(self.game.width // 2, self.game.height // 4))
         surface.blit(title_text, title_rect)
         
         # Draw score
-        font_score = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 35)
-        score_text = font_score.render(f'Final Score: {score}', True, (255, 255, 255))
+        score_text = text_cache.render(f'Final Score: {score}', 35)
         score_rect = score_text.get_rect(center=(self.game.width // 2, self.game.height // 2))
         surface.blit(score_text, score_rect)
         
+        if scores and len(scores) > 1:
+            for player, player_score in enumerate(scores):
+                player_text = text_cache.render(f'P{player + 1}: {player_score}', 28, PLAYER_COLORS[player])
+                player_rect = player_text.get_rect(
+                    center=(self.game.width * (player + 1) // (len(scores) + 1), self.game.height // 2 + 50))
+                surface.blit(player_text, player_rect)
+                
         # Create buttons if they don't exist
         if 'play_again' not in self.buttons:
             self.create_button('play_again', 'Play Again', self.game.width // 2 - 100, self.game.height * 3 // 4, 
@@ -174,21 +194,10 @@ class UI:
         # Find a fact that hasn't been displayed yet
         for fact in self.fruit_facts:
             if fact not in self.facts_displayed:
-                fact_font = pygame.font.Font(os.path.join('assets', 'fonts', 'mario.otf'), 20)
+                fact_font = text_cache.font(20)
                 
-                # Create text surface with word wrapping
-                fact_lines = []
-                words = fact.split(' ')
-                current_line = words[0]
-                for word in words[1:]:
-                    test_line = current_line + ' ' + word
-                    # Check if the line is too long
-                    if fact_font.size(test_line)[0] > self.game.width - 100:
-                        fact_lines.append(current_line)
-                        current_line = word
-                    else:
-                        current_line = test_line
-                fact_lines.append(current_line)
+                # Word wrapping is cached per fact and screen width
+                fact_lines = text_cache.wrap(fact, 20, self.game.width - 100)
                 
                 # Create a surface for the fact box
                 padding = 20
@@ -200,7 +209,7 @@ class UI:
                 
                 # Draw the fact text
                 for i, line in enumerate(fact_lines):
-                    text_surface = fact_font.render(line, True, (255, 255, 255))
+                    text_surface = text_cache.render(line, 20)
                     fact_box.blit(text_surface, (padding, padding + i * line_height))
                 
                 # Position and draw the fact box
@@ -222,64 +231,72 @@ class UI:
         return None
             
 class EffectManager:
-    """Manages visual effects like slices, explosions, etc."""
+    """Manages visual effects like slices, explosions, etc.
+    
+    Every effect of a type lives equally long, so each type is a queue in
+    order of expiry. Update only drops expired effects from the front.
+    Explosions are one blit of a pre-rendered frame and slices one line
+    from a table of end points, which beats blitting a line image.
+    """
+    
+    SLICE_LIFETIME = 10
+    EXPLOSION_LIFETIME = 30
     
     def __init__(self, game):
         self.game = game
-        self.effects = []
+        self.tick = 0  # Updates so far, effects store the tick they expire at
+        self.slices = deque()  # (expires, x, y, end_x, end_y)
+        self.explosions = deque()  # (expires, x, y)
+        self.slice_ends = effect_frames.slice_ends()
         
     def add_effect(self, effect_type, x, y):
-        """Add a new effect"""
+        """Add a new effect, dropped when the quality setting caps the effects on screen"""
+        max_effects = self.game.settings['max_effects']
+        if max_effects is not None and len(self) >= max_effects:
+            return
         if effect_type == 'slice':
-            # Slice effect
-            self.effects.append({
-                'type': 'slice',
-                'x': x,
-                'y': y,
-                'lifetime': 10,
-                'rotation': random.randint(0, 360),
-                'color': (255, 255, 255)
-            })
+            end_x, end_y = self.slice_ends[random.randint(0, 360)]
+            self.slices.append((self.tick + self.SLICE_LIFETIME, x, y, x + end_x, y + end_y))
         elif effect_type == 'explosion':
-            # Explosion effect
-            self.effects.append({
-                'type': 'explosion',
-                'x': x,
-                'y': y,
-                'lifetime': 30,
-                'radius': 10
-            })
-        
+            self.explosions.append((self.tick + self.EXPLOSION_LIFETIME, x, y))
+            
     def update(self):
         """Update all effects"""
-        for effect in self.effects[:]:
-            effect['lifetime'] -= 1
-            if effect['lifetime'] <= 0:
-                self.effects.remove(effect)
-                
-    def draw(self, surface):
-        """Draw all effects"""
-        for effect in self.effects:
-            if effect['type'] == 'slice':
-                # Draw slice effect (a line)
-                angle = effect['rotation']
-                length = 50
-                end_x = effect['x'] + length * pygame.math.Vector2(1, 0).rotate(angle).x
-                end_y = effect['y'] + length * pygame.math.Vector2(1, 0).rotate(angle).y
-                
-                # Make the effect fade out
-                alpha = int((effect['lifetime'] / 10) * 255)
-                color = list(effect['color'])
-                color.append(alpha)
+        self.tick += 1
+        tick = self.tick
+        slices = self.slices
+        while slices and slices[0][0] <= tick:
+            slices.popleft()
+        explosions = self.explosions
+        while explosions and explosions[0][0] <= tick:
+            explosions.popleft()
+            
+    def clear(self):
+        """Remove all effects"""
+        self.slices.clear()
+        self.explosions.clear()
+        
+    def __len__(self):
+        """Get the number of live effects"""
+        return len(self.slices) + len(self.explosions)
+        
+    def draw(self, surface, dirty=None):
+        """Draw all effects, adding the touched rects to dirty"""
+        tick = self.tick
+        
+        # Low detail draws thin slices and explosions without the fade blend
+        full_detail = self.game.settings['effect_detail'] == 'full'
+        width = 3 if full_detail else 1
+        
+        # Slice effect (a line)
+        for _, x, y, end_x, end_y in self.slices:
+            rect = pygame.draw.line(surface, (255, 255, 255), (x, y), (end_x, end_y), width)
+            if dirty is not None:
+                dirty.append(rect)
                 
-                pygame.draw.line(surface, color, 
-                                (effect['x'], effect['y']), 
-                                (end_x, end_y), 
-                                3)
-            elif effect['type'] == 'explosion':
-                # Draw explosion effect (expanding circle)
-                radius = 10 + (30 - effect['lifetime']) * 3
-                alpha = int((effect['lifetime'] / 30) * 255)
-                explosion_surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
-                pygame.draw.circle(explosion_surface, (255, 100, 0, alpha), (radius, radius), radius)
-                surface.blit(explosion_surface, (effect['x'] - radius, effect['y'] - radius))
+        # Explosion effect (expanding circle)
+        for expires, x, y in self.explosions:
+            image, offset = effect_frames.explosion(expires - tick, self.EXPLOSION_LIFETIME, full_detail)
+            rect = surface.blit(image, (x + offset[0], y + offset[1]))
+            if dirty is not None:
+                dirty.append(rect)
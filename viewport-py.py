@@ -0,0 +1,98 @@
+import pygame
+from collections import deque
+
+# Render scales the governor steps through, each cheaper than the one before.
+# A filtered pass plus the stretch only beats filtering at full size well below 1.
+SCALES = (1.0, 0.6, 0.5, 0.4, 0.3)
+
+class Viewport:
+    """Fixed logical-resolution back buffer scaled to fit the display once per frame
+    
+    Everything is drawn to surface in logical pixels. When the display has
+    another size, present() scales the buffer to the largest centered rect of
+    the same aspect ratio. The scale factor sets the resolution of the filtered
+    upscale as a fraction of that rect; the rest of the way is a nearest pixel
+    stretch, which is much cheaper on big panels. At the lowest scale only the
+    stretch is left. With dynamic on, govern() steps the scale down while frames
+    go over budget and back up when there is headroom.
+    """
+    
+    def __init__(self, display, logical_size, dynamic=False, budget=1 / 60, window=60):
+        self.display = display
+        self.logical_size = logical_size
+        self.scaled = display.get_size() != tuple(logical_size)
+        self.surface = pygame.Surface(logical_size).convert() if self.scaled else display
+        
+        # Largest rect of the logical aspect ratio that fits, black bars around it
+        zoom = min(display.get_width() / logical_size[0], display.get_height() / logical_size[1])
+        self.rect = pygame.Rect(0, 0, round(logical_size[0] * zoom), round(logical_size[1] * zoom))
+        self.rect.center = display.get_rect().center
+        self.target = display.subsurface(self.rect) if self.scaled else None
+        display.fill((0, 0, 0))
+        
+        # Below min_scale the filtered pass would be smaller than the back buffer
+        self.min_scale = min(1.0, 1 / zoom)
+        self.scales = [scale for scale in SCALES if scale > self.min_scale] + [self.min_scale]
+        self.level = 0
+        self.scale = 1.0
+        self.intermediate = None
+        
+        # Dynamic resolution governor
+        self.dynamic = dynamic and self.scaled
+        self.budget = budget
+        self.frame_times = deque(maxlen=window)  # Seconds of work per frame, sleeping excluded
+        
+    def to_logical(self, pos):
+        """Convert a display position, like the mouse, to logical coordinates"""
+        if not self.scaled:
+            return pos
+        return (int((pos[0] - self.rect.x) * self.logical_size[0] / self.rect.width),
+                int((pos[1] - self.rect.y) * self.logical_size[1] / self.rect.height))
+                
+    def present(self):
+        """Scale the back buffer to the display and show it"""
+        if self.scaled:
+            size = (round(self.rect.width * self.scale), round(self.rect.height * self.scale))
+            if self.scale >= 1.0:
+                pygame.transform.smoothscale(self.surface, self.rect.size, self.target)
+            elif self.scale <= self.min_scale:
+                pygame.transform.scale(self.surface, self.rect.size, self.target)
+            else:
+                # Filter at the reduced size, then stretch to the display
+                if self.intermediate is None or self.intermediate.get_size() != size:
+                    self.intermediate = pygame.Surface(size).convert()
+                pygame.transform.smoothscale(self.surface, size, self.intermediate)
+                pygame.transform.scale(self.intermediate, self.rect.size, self.target)
+        pygame.display.flip()
+        
+    def govern(self, frame_time):
+        """Add the work time of a frame and move the render scale by one step when needed"""
+        if not self.dynamic:
+            return
+        self.frame_times.append(frame_time)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+            
+        # Go down on a slow 90th percentile, only go back up with clear headroom
+        ordered = sorted(self.frame_times)
+        p90 = ordered[int(len(ordered) * 0.9)]
+        if p90 > self.budget and self.level < len(self.scales) - 1:
+            self.set_level(self.level + 1)
+        elif p90 < self.budget * 0.7 and self.level > 0:
+            self.set_level(self.level - 1)
+            
+    def set_level(self, level):
+        """Change to one of the render scales and wait a full window of frames before judging it"""
+        self.level = level
+        self.scale = self.scales[level]
+        self.frame_times.clear()
+        print(f"Render scale {self.scale:.2f} ({round(self.rect.width * self.scale)}x{round(self.rect.height * self.scale)})")
+        
+    def stats(self):
+        """Get the display mapping and the current render scale"""
+        return {
+            'logical': tuple(self.logical_size),
+            'display': self.display.get_size(),
+            'rect': tuple(self.rect),
+            'scale': self.scale
+        }